@@ -1,13 +1,15 @@
 import joblib
 import pandas as pd
 import numpy as np
-import unicodedata
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from pathlib import Path
 from typing import Optional
 
+# normalización compartida con entrenamiento/batch (se sirve desde la raíz: uvicorn api.app:app)
+from pipelines.normalizacion import norm_text_cached, to_bool01
+
 
 # ===== PATH ROBUSTO =====
 BASE_DIR = Path(__file__).resolve().parent
@@ -21,38 +23,29 @@ CANDIDATES = [
 MODEL_PATH = next((p for p in CANDIDATES if p.exists()), CANDIDATES[0])
 
 bundle = joblib.load(MODEL_PATH)
-models = bundle["models"]          # {0.10:..., 0.50:..., 0.90:...}
+models = bundle["models"]          # {0.10:..., 0.50:..., 0.90:...} (+ otros si se entrenaron)
 preproc = bundle["preproc"]
 
+# /predict devuelve p10/p50/p90: mejor fallar al arrancar que en cada request
+_missing_q = [q for q in (0.10, 0.50, 0.90) if q not in models]
+if _missing_q:
+    raise RuntimeError(f"{MODEL_PATH}: el bundle no tiene los cuantiles {_missing_q} que usa /predict")
+
 FEATURES = preproc["features"]
 FREQ_MAPS = preproc.get("freq_maps", {})
 YEAR_REF = int(preproc.get("year_ref", 2026))
 
+# "gbr" (freq + one-hot) o "hist" (categóricas nativas como códigos de cat_vocab)
+BACKEND = preproc.get("backend", "gbr")
+CAT_CODES = {
+    col: {v: float(i) for i, v in enumerate(vocab)}
+    for col, vocab in (preproc.get("cat_vocab") or {}).items()
+}
+
 CV_GLOBAL_MEDIAN = float(preproc.get("cv_global_median", 0.0))
 MEDIAN_CV_BY_MODEL = preproc.get("median_cv_by_model", {}) or {}
 
 
-# ===== Normalización igual a entrenamiento =====
-def strip_accents(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s)
-    return "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-
-def norm_text(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).replace("–", "-").replace("—", "-")
-    s = strip_accents(s)
-    s = s.lower().strip()
-    s = s.replace("-", " ")
-    s = " ".join(s.split())
-    return s
-
-
 def _norm_str_or_none(x):
     if x is None:
         return None
@@ -60,16 +53,6 @@ def _norm_str_or_none(x):
     return s if s else None
 
 
-def _to_bool(x) -> int:
-    """Devuelve 1/0 para aire/vidrio (acepta true/1/si)."""
-    if x is None:
-        return 0
-    if isinstance(x, bool):
-        return int(x)
-    s = str(x).strip().lower()
-    return 1 if s in {"true", "1", "si", "sí", "yes", "y"} else 0
-
-
 # ===== FastAPI =====
 app = FastAPI(title="Estimador Autos (Rango)")
 
@@ -127,12 +110,12 @@ def build_features(payload: dict) -> pd.DataFrame:
         if k in cat_candidates:
             payload[k] = _norm_str_or_none(payload.get(k))
             if payload[k] is not None:
-                payload[k] = norm_text(payload[k])
+                payload[k] = norm_text_cached(payload[k])
 
     # 2) Booleans -> int (por si tu entrenamiento los incluyó como features)
     #    Si el modelo no los usa, igual quedan y luego se descartan.
-    payload["aire"] = _to_bool(payload.get("aire"))
-    payload["vidrio"] = _to_bool(payload.get("vidrio"))
+    payload["aire"] = to_bool01(payload.get("aire"))
+    payload["vidrio"] = to_bool01(payload.get("vidrio"))
 
     df = pd.DataFrame([payload])
 
@@ -148,6 +131,12 @@ def build_features(payload: dict) -> pd.DataFrame:
         edad = (YEAR_REF - df["anio"]).clip(lower=1)
         df["kms_por_anio"] = df["kms"] / edad
 
+    # 4b) Backend hist: código por categoría (desconocida -> NaN = missing), sin freq/one-hot
+    if BACKEND == "hist":
+        for col, codes in CAT_CODES.items():
+            df[col] = df[col].map(codes) if col in df.columns else np.nan
+        return df.reindex(columns=FEATURES).astype(float)
+
     # 5) Imputación cv (si tu modelo la usa)
     if "cv" in df.columns:
         # Si cv viene NaN, intentamos por modelo (si hay mapa y hay alguna columna de modelo)
@@ -182,7 +171,8 @@ def build_features(payload: dict) -> pd.DataFrame:
                 onehot_bases.add(base)
 
     onehot_cols = [c for c in onehot_bases if c in df.columns]
-    df_ml = pd.get_dummies(df, columns=onehot_cols, drop_first=True)
+    # drop_first=False igual que en entrenamiento (con 1 fila, drop_first=True borraba su categoría)
+    df_ml = pd.get_dummies(df, columns=onehot_cols, drop_first=False)
 
     # 8) Forzar exactamente FEATURES
     for col in FEATURES:
@@ -201,6 +191,7 @@ def health():
         "model_path": str(MODEL_PATH).replace("\\", "/"),
         "n_features": len(FEATURES),
         "year_ref": YEAR_REF,
+        "backend": BACKEND,
     }
 
 
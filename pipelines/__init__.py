@@ -0,0 +1,4 @@
+"""
+Paquete solo para lo que importa la API (pipelines.normalizacion). Los scripts de acá se
+siguen corriendo sueltos (python pipelines/model.py) y se importan entre sí por nombre.
+"""
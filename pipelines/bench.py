@@ -0,0 +1,548 @@
+"""
+Benchmarks de los pipelines (no se usan en producción).
+
+    python pipelines/bench.py loader --rows 5000000
+    python pipelines/bench.py normalize --rows 1000000
+    python pipelines/bench.py score --rows 2000000 --chunk-size 50000
+    python pipelines/bench.py score-workers --rows 10000000
+    python pipelines/bench.py brands --rows 500000
+    python pipelines/bench.py dedupe --rows 2000000
+    python pipelines/bench.py clean-engines --rows 1000000
+    python pipelines/bench.py textacsv --files 2000 --baseline HEAD
+    python pipelines/bench.py textacsv-workers --files 5000
+    python pipelines/bench.py pdf-fused --root pipelines/pdfs --workers 4
+
+Cada caso imprime una tabla "antes / después" para comparar entre versiones.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from perf import peak_rss_mb
+
+HERE = Path(__file__).resolve().parent
+TMP_DIR = Path(tempfile.gettempdir()) / "estimador_bench"
+
+
+# =========================
+# Datos sintéticos
+# =========================
+def synthetic_listings(n: int, seed: int = 0) -> pd.DataFrame:
+    """Avisos con la forma de autos_dataset_limpio.csv (texto con acentos/mayúsculas)."""
+    rng = np.random.default_rng(seed)
+    marcas = np.array(["Renault", "Ford", "Toyota", "Fiat", "Volkswagen", "Chevrolet", "Peugeot",
+                       "Citroën", "Alfa-Romeo", "Mercedes-Benz", "Jeep", "Honda", "Nissan", "Kia"])
+    modelos = np.array([f"Modelo {i}" for i in range(400)])
+    versiones = np.array([f"{t} {d:.1f} {x}" for t in ("Confort", "Highline", "Privilège", "Xls", "Sedán")
+                          for d in np.arange(1.0, 3.0, 0.1) for x in range(200)])
+    anio = rng.integers(1990, 2026, n)
+    kms = rng.integers(0, 400_000, n)
+    precio = (30_000 * (1 - (2026 - anio) * 0.025) * (1 - kms / 900_000) * rng.uniform(0.7, 1.3, n)).astype(int) + 1_500
+    return pd.DataFrame({
+        "marca": rng.choice(marcas, n),
+        "modelo": rng.choice(modelos, n),
+        "version": rng.choice(versiones, n),
+        "anio": anio,
+        "kms": kms,
+        "precio_usd": precio,
+        "combustible": rng.choice(["nafta", "diesel", "nafta-gnc", "híbrido"], n),
+        "transmision": rng.choice(["manual", "automática"], n),
+        "direccion": rng.choice(["hidráulica", "eléctrica", "mecánica", ""], n),
+        "aire": rng.choice([True, False], n),
+        "vidrio": rng.choice([True, False], n),
+    })
+
+
+def synthetic_csv(n: int) -> Path:
+    path = TMP_DIR / f"limpio_{n}.csv"
+    if not path.exists():
+        TMP_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"Generando {n:,} filas sintéticas -> {path}")
+        synthetic_listings(n).to_csv(path, index=False)
+    return path
+
+
+def run_isolated(case: str, *args) -> dict:
+    """Corre un caso en un proceso nuevo (pico de RSS limpio) y devuelve su JSON."""
+    out = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "_run", case, *map(str, args)],
+        check=True, capture_output=True, text=True, cwd=HERE,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_table(rows: list[dict], cols: list[str]) -> None:
+    print(" | ".join(f"{c:>14}" for c in cols))
+    for r in rows:
+        print(" | ".join(f"{r[c]:>14.2f}" if isinstance(r[c], float) else f"{r[c]:>14}" for c in cols))
+
+
+# =========================
+# Casos
+# =========================
+def _run_loader(variant: str, csv_path: str) -> dict:
+    import model
+
+    t0 = time.perf_counter()
+    if variant == "antes":
+        # lectura con dtypes por defecto + one-hot denso + matriz densa para el fit
+        X, y, _ = model.prepare_ml_table(pd.read_csv(csv_path), backend="gbr", sparse=False)
+        M = X.to_numpy(dtype=np.float32)
+    else:
+        X, y, _ = model.prepare_ml_table(model.read_training_csv(csv_path), backend="gbr")
+        M = model.to_matrix(X)
+    return {
+        "variante": variant,
+        "filas": int(M.shape[0]),
+        "seg": round(time.perf_counter() - t0, 2),
+        "pico_rss_mb": round(peak_rss_mb() or 0.0, 1),
+    }
+
+
+def bench_loader(args) -> None:
+    csv_path = synthetic_csv(args.rows)
+    rows = [run_isolated("loader", v, csv_path) for v in ("antes", "despues")]
+    print(f"\n===== LOADER ({args.rows:,} filas) =====")
+    print_table(rows, ["variante", "filas", "seg", "pico_rss_mb"])
+
+
+def bench_normalize(args) -> None:
+    from normalizacion import norm_text, norm_series
+
+    df = synthetic_listings(args.rows)
+    col = df["version"]
+    print(f"\n===== NORMALIZACION ({args.rows:,} filas, {col.nunique():,} valores distintos) =====")
+
+    t0 = time.perf_counter()
+    por_fila = col.map(norm_text)
+    t_fila = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    por_valor = norm_series(col)
+    t_valor = time.perf_counter() - t0
+
+    assert por_fila.equals(por_valor), "norm_series no coincide con .map(norm_text)"
+    print_table([
+        {"variante": ".map(norm_text)", "seg": t_fila, "filas_por_seg": f"{args.rows / t_fila:,.0f}"},
+        {"variante": "norm_series", "seg": t_valor, "filas_por_seg": f"{args.rows / t_valor:,.0f}"},
+    ], ["variante", "seg", "filas_por_seg"])
+
+
+def scoring_csv(n: int) -> Path:
+    """Entrada de scoring: como el limpio pero sin precio."""
+    path = TMP_DIR / f"scoring_{n}.csv"
+    if not path.exists():
+        TMP_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"Generando {n:,} filas sintéticas -> {path}")
+        synthetic_listings(n, seed=1).drop(columns="precio_usd").to_csv(path, index=False)
+    return path
+
+
+def _run_score(variant: str, bundle_path: str, csv_path: str, chunk_size: str) -> dict:
+    import predict
+
+    bundle = predict.load_bundle(bundle_path)
+    out_path = TMP_DIR / f"scored_{variant}.csv"
+    t0 = time.perf_counter()
+    if variant == "todo":
+        df = pd.read_csv(csv_path)
+        n = len(df)
+        pd.concat([df, predict.predict_batch(bundle, df)], axis=1).to_csv(out_path, index=False)
+    else:
+        n = predict.predict_stream(bundle, csv_path, out_path, chunk_size=int(chunk_size), verbose=False)["rows"]
+    seg = time.perf_counter() - t0
+    return {
+        "variante": variant,
+        "filas": n,
+        "seg": round(seg, 2),
+        "filas_por_seg": round(n / seg),
+        "pico_rss_mb": round(peak_rss_mb() or 0.0, 1),
+    }
+
+
+def bench_score(args) -> None:
+    csv_path = scoring_csv(args.rows)
+    rows = [run_isolated("score", v, args.bundle, csv_path, args.chunk_size) for v in ("todo", "stream")]
+    print(f"\n===== SCORING ({args.rows:,} filas, chunk {args.chunk_size:,}) =====")
+    print_table(rows, ["variante", "filas", "seg", "filas_por_seg", "pico_rss_mb"])
+
+
+def _run_score_workers(workers: str, bundle_path: str, csv_path: str, chunk_size: str) -> dict:
+    import predict
+
+    out_path = TMP_DIR / f"scored_w{workers}.csv"
+    st = predict.predict_stream(bundle_path, csv_path, out_path, chunk_size=int(chunk_size),
+                                workers=int(workers), verbose=False)
+    return {"workers": int(workers), "seg": st["seconds"], "filas_por_seg": round(st["rows_per_s"])}
+
+
+def bench_score_workers(args) -> None:
+    import os
+
+    csv_path = scoring_csv(args.rows)
+    counts = args.workers or sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    rows = [run_isolated("score_workers", w, args.bundle, csv_path, args.chunk_size) for w in counts]
+    base = rows[0]["filas_por_seg"]
+    for r in rows:
+        r["speedup"] = round(r["filas_por_seg"] / base, 2)
+    print(f"\n===== SCORING MULTIPROCESO ({args.rows:,} filas, {os.cpu_count()} cores) =====")
+    print_table(rows, ["workers", "seg", "filas_por_seg", "speedup"])
+
+
+def synthetic_raw_modelos(n: int, seed: int = 0) -> list[tuple[str, str]]:
+    """(marca, modelo completo) como vienen del scrape: mayúsculas, guiones, marcas que no matchean."""
+    from limpieza import BRANDS_RAW
+
+    rng = np.random.default_rng(seed)
+    marcas = BRANDS_RAW + ["Tata", "Lada", "Dacia"]
+    out = []
+    for i in range(n):
+        b = marcas[rng.integers(len(marcas))]
+        shown = (b, b.lower(), b.replace(" ", "-"), b.upper())[i % 4]
+        csv_marca = b.lower().replace(" ", "-") if i % 11 else "otra"
+        out.append((csv_marca, f"{shown} Modelo{rng.integers(300)} 1.{rng.integers(10)} Versión {rng.integers(50)}"))
+    return out
+
+
+def synthetic_raw_csv(n: int) -> Path:
+    """autos_dataset.csv crudo (entrada de limpieza.py), con duplicados y filas inválidas."""
+    path = TMP_DIR / f"raw_{n}.csv"
+    if path.exists():
+        return path
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"Generando {n:,} filas crudas sintéticas -> {path}")
+    rng = np.random.default_rng(1)
+    modelos = synthetic_raw_modelos(n)
+    df = pd.DataFrame({
+        "marca": [m for m, _ in modelos],
+        "modelo": [full for _, full in modelos],
+        "anio": rng.integers(1990, 2026, n).astype(str),
+        "kms": [f"{k:,}".replace(",", ".") for k in rng.integers(0, 400_000, n)],
+        "precio_usd": rng.integers(1_500, 60_000, n).astype(str),
+        "combustible": rng.choice(["Nafta", "Di-sel", "Nafta/GNC", "h-brido", ""], n),
+        "transmision": rng.choice(["MT", "AT", "autom-tica", "Manual"], n),
+        "direccion": rng.choice(["hidr-ulica", "El-ctrica", "mec-nica", ""], n),
+        "aire": rng.choice(["Sí", "No", "true", ""], n),
+        "cristales": rng.choice(["Sí", "No", ""], n),
+    })
+    # ~10% de re-publicaciones del mismo aviso (con otros extras)
+    dup = df.sample(frac=0.1, random_state=2).assign(aire="Sí", cristales="Sí")
+    pd.concat([df, dup]).to_csv(path, index=False)
+    return path
+
+
+def _run_dedupe(mode: str, csv_path: str) -> dict:
+    import limpieza
+
+    t0 = time.perf_counter()
+    cleaned = limpieza.iter_clean_rows(Path(csv_path))
+    if mode == "memory":
+        rows = limpieza.dedupe_memory(cleaned)
+    else:
+        rows = limpieza.dedupe_sqlite(cleaned, TMP_DIR / "dedupe.sqlite")
+    n = limpieza.write_rows(TMP_DIR / f"limpio_{mode}.csv", rows)
+    return {
+        "modo": mode,
+        "filas": n,
+        "seg": round(time.perf_counter() - t0, 2),
+        "pico_rss_mb": round(peak_rss_mb() or 0.0, 1),
+    }
+
+
+def bench_dedupe(args) -> None:
+    csv_path = synthetic_raw_csv(args.rows)
+    rows = [run_isolated("dedupe", m, csv_path) for m in ("memory", "disk")]
+    same = (TMP_DIR / "limpio_memory.csv").read_bytes() == (TMP_DIR / "limpio_disk.csv").read_bytes()
+    print(f"\n===== DEDUPE limpieza.py ({args.rows:,} filas crudas) =====")
+    print_table(rows, ["modo", "filas", "seg", "pico_rss_mb"])
+    print(f"salidas idénticas: {same}")
+
+
+def _run_clean_engine(engine: str, csv_path: str) -> dict:
+    import limpieza
+
+    out = TMP_DIR / f"limpio_engine_{engine}.csv"
+    t0 = time.perf_counter()
+    if engine == "rows":
+        n = limpieza.write_rows(out, limpieza.dedupe_memory(limpieza.iter_clean_rows(Path(csv_path))))
+    else:
+        n = limpieza.write_frame(out, limpieza.clean_frame(limpieza.read_raw_frame(Path(csv_path))))
+    seg = time.perf_counter() - t0
+    filas_in = sum(1 for _ in open(csv_path, encoding="utf-8")) - 1
+    return {
+        "motor": engine,
+        "filas_salida": n,
+        "seg": round(seg, 2),
+        "filas_por_seg": round(filas_in / seg),
+        "pico_rss_mb": round(peak_rss_mb() or 0.0, 1),
+    }
+
+
+def bench_clean_engines(args) -> None:
+    csv_path = synthetic_raw_csv(args.rows)
+    rows = [run_isolated("clean_engine", e, csv_path) for e in ("rows", "columns")]
+    same = (TMP_DIR / "limpio_engine_rows.csv").read_bytes() == (TMP_DIR / "limpio_engine_columns.csv").read_bytes()
+    print(f"\n===== MOTORES limpieza.py ({args.rows:,} filas crudas) =====")
+    print_table(rows, ["motor", "filas_salida", "seg", "filas_por_seg", "pico_rss_mb"])
+    print(f"salidas idénticas (byte a byte): {same}")
+
+
+def _brands_legacy(limpieza, marca: str, modelo_full: str):
+    """detect_brand_prefix + comparación de marca como estaban antes (loop de regex, sin cache)."""
+    simplify = limpieza.brand_simplify.__wrapped__
+    full = limpieza.norm(modelo_full)
+    brand, rest = "", full
+    for b_display, pat in limpieza.BRAND_PATTERNS:
+        m = pat.match(full)
+        if m:
+            brand, rest = b_display, full[m.end():].strip()
+            break
+    return brand, rest, bool(brand) and simplify(brand) == simplify(marca)
+
+
+def _brands_new(limpieza, marca: str, modelo_full: str):
+    brand, rest = limpieza.detect_brand_prefix(modelo_full)
+    return brand, rest, bool(brand) and limpieza.brand_simplify(brand) == limpieza.brand_simplify(marca)
+
+
+def bench_brands(args) -> None:
+    import limpieza
+
+    rows = synthetic_raw_modelos(args.rows)
+    print(f"\n===== MARCA AL INICIO ({args.rows:,} filas, {len(limpieza.BRAND_PATTERNS)} marcas) =====")
+    results, table = {}, []
+    for variant, fn in (("loop de regex", _brands_legacy), ("matcher único", _brands_new)):
+        t0 = time.perf_counter()
+        results[variant] = [fn(limpieza, marca, full) for marca, full in rows]
+        seg = time.perf_counter() - t0
+        table.append({"variante": variant, "seg": seg, "filas_por_seg": f"{args.rows / seg:,.0f}"})
+    assert results["loop de regex"] == results["matcher único"], "el matcher combinado no coincide"
+    print_table(table, ["variante", "seg", "filas_por_seg"])
+
+
+def synthetic_text_corpus(n_files: int, listings_per_file: int = 48, seed: int = 0) -> Path:
+    """
+    textos/<marca>/<combustible>/<transmision>/<direccion>/<otros>/*.txt con el formato
+    de pdfatext.py: META, PAGE, SETTINGS y RESULTS LEFT/RIGHT con avisos, ruido,
+    anticipos, vendedores, cortes de página y líneas repetidas.
+    """
+    root = TMP_DIR / f"textos_{n_files}"
+    if root.exists():
+        return root
+    print(f"Generando {n_files:,} textos sintéticos -> {root}")
+    rng = np.random.default_rng(seed)
+    marcas = {"alfa-romeo": "Alfa Romeo", "citroen": "Citroën", "toyota": "Toyota", "ford": "Ford",
+              "volkswagen": "Volkswagen", "mercedes-benz": "Mercedes Benz", "audi": "Audi", "baic": "BAIC"}
+    otros = ["sin-extras", "con-aire-acondicionado", "con-aire-acondicionado__con-cristales-electricos"]
+    noise = ["Ordenar por Más relevantes", "Resultados", "Siguiente", "Mostrar más", "Ad",
+             "Vehículo validado", "Creá tu cuenta Ingresá Mis compras", "2", "Tiendas oficiales"]
+    versions = ["1.8 Xei Cvt", "2.0 Tsi Highline", "Quattro", "105cv", "1.6 Feel Pack", "At6",
+                "C 200 Avantgarde", "Sedán 4p", "Giulia 2.0", "Vti 1.6 Tendance"]
+    vendors = ["Grupo Autos SRL", "Taraborelli Automotores", "Concesionaria Oficial", "Particular"]
+    for f_idx in range(n_files):
+        slug = list(marcas)[f_idx % len(marcas)]
+        folder = root / slug / "nafta" / "manual" / "hidraulica" / otros[f_idx % len(otros)]
+        folder.mkdir(parents=True, exist_ok=True)
+        lines = ["--- META ---", f"marca={slug}", "--- /META ---", ""]
+        for page in range(1, 4):
+            lines += [f"--- PAGE {page} ---", "--- SETTINGS ---", "SIDEBAR_X = 200", "CROP_Y0   = 70.0"]
+            for side in ("LEFT", "RIGHT"):
+                lines.append(f"--- RESULTS {side} ---")
+                for _ in range(listings_per_file // 6):
+                    r = rng.random(8)
+                    brand = marcas[slug] if r[0] > 0.1 else rng.choice(list(marcas.values()))
+                    if r[1] < 0.3:
+                        lines.append(str(rng.choice(noise)))
+                    lines.append(f"{brand} Modelo{rng.integers(40)} {rng.choice(versions)}")
+                    if r[2] < 0.3:
+                        lines.append("pack full")  # continuación en minúscula (corte)
+                    if r[3] < 0.15:
+                        lines.append(f"Anticipo de $ {rng.integers(1, 9)}.000.000")
+                    if r[4] < 0.5:
+                        lines.append(f"US$ {rng.integers(5, 60)}.{rng.integers(100, 999)}")
+                    else:
+                        lines.append(f"$ {rng.integers(8, 90)}.{rng.integers(100, 999)}.000")
+                    lines.append(f"{rng.integers(1995, 2025)} | {rng.integers(0, 300)}.{rng.integers(100, 999)} Km")
+                    if r[5] < 0.9:
+                        lines.append(f"Barrio {rng.integers(30)} - Capital Federal")
+                    if r[6] < 0.3:
+                        lines.append(str(rng.choice(vendors)))
+                    if r[7] < 0.1:
+                        lines.append(lines[-1])  # repetida
+        (folder / f"pagina_{f_idx:05d}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return root
+
+
+def load_module_at(rev: str, relpath: str, name: str):
+    """Versión de un módulo del repo en otra revisión de git (línea de base de un bench)."""
+    import types
+
+    src = subprocess.run(["git", "show", f"{rev}:{relpath}"], check=True, capture_output=True,
+                         text=True, cwd=HERE).stdout
+    mod = types.ModuleType(name)
+    mod.__file__ = f"{rev}:{relpath}"
+    exec(compile(src, mod.__file__, "exec"), mod.__dict__)
+    return mod
+
+
+def bench_textacsv(args) -> None:
+    import textacsv
+
+    root = synthetic_text_corpus(args.files)
+    files = sorted(root.glob("*/*/*/*/*/*.txt"))
+    n_lines = sum(len(f.read_text(encoding="utf-8").splitlines()) for f in files)
+    baseline = load_module_at(args.baseline, "pipelines/textacsv.py", "textacsv_base")
+
+    table, results = [], {}
+    for variant, mod in ((f"base ({args.baseline})", baseline), ("actual", textacsv)):
+        t0 = time.perf_counter()
+        results[variant] = [r for f in files for r in mod.extract_records_from_txt(f)]
+        seg = time.perf_counter() - t0
+        table.append({"variante": variant, "registros": len(results[variant]), "seg": seg,
+                      "lineas_por_seg": f"{n_lines / seg:,.0f}"})
+    a, b = results.values()
+    print(f"\n===== textacsv ({len(files):,} archivos, {n_lines:,} líneas) =====")
+    print_table(table, ["variante", "registros", "seg", "lineas_por_seg"])
+    print(f"registros idénticos: {a == b}")
+
+
+def _run_textacsv_workers(workers: str, root: str) -> dict:
+    import textacsv
+
+    files = sorted(Path(root).glob("*/*/*/*/*/*.txt"))
+    st = textacsv.write_dataset(files, TMP_DIR / f"autos_dataset_w{workers}.csv", int(workers))
+    return {"workers": int(workers), "seg": st["seconds"], "registros": st["rows"],
+            "archivos_por_seg": round(len(files) / st["seconds"])}
+
+
+def bench_textacsv_workers(args) -> None:
+    import os
+
+    root = synthetic_text_corpus(args.files)
+    counts = args.workers or sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    rows = [run_isolated("textacsv_workers", w, root) for w in counts]
+    base = rows[0]["archivos_por_seg"]
+    for r in rows:
+        r["speedup"] = round(r["archivos_por_seg"] / base, 2)
+    outputs = {(TMP_DIR / f"autos_dataset_w{r['workers']}.csv").read_bytes() for r in rows}
+    print(f"\n===== textacsv MULTIPROCESO ({args.files:,} archivos, {os.cpu_count()} cores) =====")
+    print_table(rows, ["workers", "seg", "registros", "archivos_por_seg", "speedup"])
+    print(f"CSV idénticos: {len(outputs) == 1}")
+
+
+def _run_pdf_pipeline(mode: str, root: str, workers: str) -> dict:
+    import shutil
+
+    import pdfatext
+    import textacsv
+
+    out_root, out_csv = TMP_DIR / "pdf_textos", TMP_DIR / f"autos_dataset_pdf_{mode}.csv"
+    shutil.rmtree(out_root, ignore_errors=True)
+    pdf_files = sorted(Path(root).glob("*/*/*/*/*/*.pdf"))
+    t0 = time.perf_counter()
+    if mode == "dos-etapas":
+        for _ in pdfatext.extracted_pdfs(pdf_files, out_root, int(workers)):
+            pass
+        t_pdf = time.perf_counter() - t0
+        st = textacsv.write_dataset(sorted(out_root.glob("*/*/*/*/*/*.txt")), out_csv, int(workers))
+        rows = st["rows"]
+    else:
+        t_pdf = None
+        rows = pdfatext.write_fused_dataset(pdfatext.fused_order(pdf_files, out_root), out_root, out_csv, int(workers))
+    seg = time.perf_counter() - t0
+    return {"modo": mode, "pdfs": len(pdf_files), "registros": rows, "seg": round(seg, 2),
+            "seg_pdf": round(t_pdf, 2) if t_pdf is not None else "-",
+            "seg_csv": round(seg - t_pdf, 2) if t_pdf is not None else "-"}
+
+
+def bench_pdf_fused(args) -> None:
+    rows = [run_isolated("pdf_pipeline", mode, args.root, args.workers) for mode in ("dos-etapas", "fusionado")]
+    same = (TMP_DIR / "autos_dataset_pdf_dos-etapas.csv").read_bytes() == (TMP_DIR / "autos_dataset_pdf_fusionado.csv").read_bytes()
+    print(f"\n===== PDF -> CSV ({rows[0]['pdfs']:,} PDFs, {args.workers} workers) =====")
+    print_table(rows, ["modo", "registros", "seg_pdf", "seg_csv", "seg"])
+    print(f"CSV idénticos: {same}")
+
+
+RUNNERS = {
+    "loader": _run_loader,
+    "score": _run_score,
+    "score_workers": _run_score_workers,
+    "dedupe": _run_dedupe,
+    "clean_engine": _run_clean_engine,
+    "textacsv_workers": _run_textacsv_workers,
+    "pdf_pipeline": _run_pdf_pipeline,
+}
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "_run":
+        # proceso hijo de run_isolated
+        print(json.dumps(RUNNERS[argv[1]](*argv[2:])))
+        return
+
+    ap = argparse.ArgumentParser(description="Benchmarks de los pipelines")
+    sub = ap.add_subparsers(dest="case", required=True)
+
+    p = sub.add_parser("loader", help="pico de RSS de read_csv + prepare_ml_table (antes/después)")
+    p.add_argument("--rows", type=int, default=5_000_000)
+    p.set_defaults(func=bench_loader)
+
+    p = sub.add_parser("normalize", help="norm_text por fila vs una vez por valor distinto")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.set_defaults(func=bench_normalize)
+
+    p = sub.add_parser("score", help="predict_batch con todo en memoria vs predict_stream por chunks")
+    p.add_argument("--bundle", default=str(HERE.parent / "api" / "model" / "modelo_rango_autos.joblib"))
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.set_defaults(func=bench_score)
+
+    p = sub.add_parser("score-workers", help="curva de escalado de predict_stream por cantidad de workers")
+    p.add_argument("--bundle", default=str(HERE.parent / "api" / "model" / "modelo_rango_autos.joblib"))
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.add_argument("--workers", type=int, nargs="+", help="cantidades a medir (default: 1 2 4 8 y #cores)")
+    p.set_defaults(func=bench_score_workers)
+
+    p = sub.add_parser("brands", help="detect_brand_prefix: loop de regex vs matcher combinado")
+    p.add_argument("--rows", type=int, default=500_000)
+    p.set_defaults(func=bench_brands)
+
+    p = sub.add_parser("dedupe", help="limpieza.py: dedupe en memoria vs sqlite (pico de RSS)")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.set_defaults(func=bench_dedupe)
+
+    p = sub.add_parser("clean-engines", help="limpieza.py: motor por filas vs columnar (pandas)")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.set_defaults(func=bench_clean_engines)
+
+    p = sub.add_parser("textacsv", help="throughput de textacsv.extract_records_from_txt vs una revisión base")
+    p.add_argument("--files", type=int, default=2_000)
+    p.add_argument("--baseline", default="HEAD", help="revisión de git a comparar (default: HEAD)")
+    p.set_defaults(func=bench_textacsv)
+
+    p = sub.add_parser("textacsv-workers", help="curva de escalado de textacsv.py por cantidad de workers")
+    p.add_argument("--files", type=int, default=5_000)
+    p.add_argument("--workers", type=int, nargs="+", help="cantidades a medir (default: 1 2 4 8 y #cores)")
+    p.set_defaults(func=bench_textacsv_workers)
+
+    p = sub.add_parser("pdf-fused", help="PDF -> CSV: pdfatext.py + textacsv.py vs pdfatext.py --fused")
+    p.add_argument("--root", default=str(HERE / "pdfs"), help="pdfs/<marca>/<combustible>/... (necesita pdfplumber)")
+    p.add_argument("--workers", type=int, default=1)
+    p.set_defaults(func=bench_pdf_fused)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
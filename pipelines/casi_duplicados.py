@@ -0,0 +1,317 @@
+"""
+Casi-duplicados: el mismo auto re-publicado con la versión escrita distinto o con
+otros kms no cae en la key exacta de limpieza.py. Acá cada aviso se convierte en un
+conjunto de tokens (modelo/version + anio/kms/precio en buckets) y se agrupan los
+que se parecen (Jaccard estimado con MinHash >= umbral).
+
+- MinHash (numpy) + LSH por bandas: los candidatos salen de los buckets de cada banda,
+  sin comparar todos contra todos. Los buckets incluyen marca, combustible y anio
+  (bloqueo: un nafta y un diesel, o un 2010 y un 2019, nunca son el mismo aviso).
+- Dentro de cada bucket solo son candidatos los pares con kms y precio cerca
+  (KMS_TOLERANCE / PRICE_TOLERANCE): el texto pesa mucho más que los 3 tokens numéricos,
+  y sin esto dos autos distintos de la misma versión se unirían. Con una versión muy
+  publicada el bucket es grande: se ordena por kms y cada fila se compara con las de la
+  ventana de kms anterior (hasta MAX_PARTNERS), no con todo el bucket.
+- Cada candidato se verifica con la similitud de las firmas; los que pasan se unen (union-find).
+- De cada cluster queda la fila con más extras (empate -> la primera), en el orden original.
+
+    python pipelines/casi_duplicados.py --in autos_dataset_limpio.csv --threshold 0.8
+"""
+import argparse
+import json
+import re
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from limpieza import FIELDNAMES, OUT_CSV, clear_state, norm_key, read_raw_frame, write_frame
+
+THRESHOLD = 0.8
+NUM_PERM = 64
+SEED = 7
+# el corte del LSH queda un poco por debajo del umbral (ver choose_bands)
+LSH_MARGIN = 0.1
+
+# buckets numéricos: re-publicaciones con pocos km / precio retocado caen en el mismo token
+KMS_BUCKET = 5_000
+PRICE_LOG_STEP = 0.05  # ~5% de diferencia de precio
+
+# condiciones duras para unir dos avisos (además de la similitud)
+KMS_TOLERANCE = 0.10
+KMS_SLACK = 5_000       # unos km más entre publicaciones, aunque el auto tenga pocos
+PRICE_TOLERANCE = 0.10
+# tope de filas anteriores (por kms) con las que se compara cada fila dentro de un bucket:
+# solo pesa con cientos de avisos con casi los mismos kms (0 km); union-find encadena el resto
+MAX_PARTNERS = 64
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+# =========================
+# Tokens
+# =========================
+def text_tokens(modelo: str, version: str) -> set[str]:
+    """Palabras de modelo/version + trigramas de version (typos, abreviaturas)."""
+    version_key = norm_key(version)
+    words = [w for w in _TOKEN_SPLIT.split(f"{norm_key(modelo)} {version_key}") if w]
+    tokens = {f"w:{w}" for w in words}
+    compact = version_key.replace(" ", "")
+    tokens.update(f"g:{compact[i:i + 3]}" for i in range(max(len(compact) - 2, 0)))
+    return tokens
+
+
+def numeric_tokens(anio: str, kms: str, precio_usd: str) -> set[str]:
+    """anio exacto + kms y precio en buckets."""
+    price = max(int(precio_usd), 1)
+    return {
+        f"anio:{anio}",
+        f"kms:{int(kms) // KMS_BUCKET}",
+        f"precio:{int(np.log(price) / PRICE_LOG_STEP)}",
+    }
+
+
+def listing_tokens(modelo: str, version: str, anio: str, kms: str, precio_usd: str) -> set[str]:
+    return text_tokens(modelo, version) | numeric_tokens(anio, kms, precio_usd)
+
+
+def _hash_tokens(tokens: set[str]) -> list[int]:
+    return [zlib.crc32(tok.encode("utf-8")) for tok in tokens]
+
+
+def token_hashes(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (fila, hash del token) para todos los tokens de todas las filas.
+    Los tokens de texto y los numéricos se calculan una vez por combinación distinta.
+    """
+    text_cache, num_cache = {}, {}
+    rows, hashes = [], []
+    cols = zip(df["modelo"], df["version"], df["anio"], df["kms"], df["precio_usd"])
+    for i, (modelo, version, anio, kms, precio) in enumerate(cols):
+        text = text_cache.get((modelo, version))
+        if text is None:
+            text = text_cache[(modelo, version)] = _hash_tokens(text_tokens(modelo, version))
+        num = num_cache.get((anio, kms, precio))
+        if num is None:
+            num = num_cache[(anio, kms, precio)] = _hash_tokens(numeric_tokens(anio, kms, precio))
+        row_hashes = text + num
+        rows.extend([i] * len(row_hashes))
+        hashes.extend(row_hashes)
+    return np.asarray(rows, dtype=np.int64), np.asarray(hashes, dtype=np.uint64)
+
+
+# =========================
+# MinHash + LSH
+# =========================
+def choose_bands(threshold: float, num_perm: int = NUM_PERM) -> tuple[int, int]:
+    """
+    (bandas, filas por banda) con el punto de corte (1/b)^(1/r) lo más cerca posible
+    de threshold - LSH_MARGIN: el LSH pide candidatos de más (mejor recall) y la
+    verificación con las firmas descarta los que no llegan al umbral.
+    """
+    target = max(threshold - LSH_MARGIN, 0.05)
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1)]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - target))
+
+
+def minhash_signatures(rows: np.ndarray, hashes: np.ndarray, n_rows: int,
+                       num_perm: int = NUM_PERM, seed: int = SEED) -> np.ndarray:
+    """
+    Firma (n_rows, num_perm) uint32. Permutaciones = hashing multiply-shift
+    ((a*x + b) mod 2^64) >> 32 con a impar; el mínimo por fila sale de reduceat.
+    rows tiene que venir ordenado (lo está: token_hashes recorre fila por fila).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    sig = np.full((n_rows, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for p in range(num_perm):
+        h = ((a[p] * hashes + b[p]) >> np.uint64(32)).astype(np.uint32)
+        sig[rows[starts], p] = np.minimum.reduceat(h, starts)
+    return sig
+
+
+def numeric_columns(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """(kms, precio_usd) como float (NaN si no es número)."""
+    return tuple(pd.to_numeric(df[c], errors="coerce").to_numpy(float) for c in ("kms", "precio_usd"))
+
+
+def kms_window(kms: np.ndarray) -> np.ndarray:
+    """Diferencia de kms máxima contra un aviso con kms <= kms."""
+    return np.maximum(KMS_TOLERANCE * kms, KMS_SLACK)
+
+
+def candidate_pairs(sig: np.ndarray, block: np.ndarray, kms: np.ndarray, price: np.ndarray,
+                    bands: int, rows_per_band: int) -> np.ndarray:
+    """
+    Pares (i, j) que comparten bucket en alguna banda (y el mismo bloque) con kms y precio cerca.
+    Cada bucket se ordena por kms y cada fila se empareja con las anteriores dentro de
+    kms_window (hasta MAX_PARTNERS): el filtro numérico va antes de armar los pares, así
+    dos re-publicaciones se encuentran aunque el bucket tenga cientos de avisos de la versión.
+    """
+    rng = np.random.default_rng(SEED + 1)
+    mult = rng.integers(1, 2**63, rows_per_band, dtype=np.uint64) | np.uint64(1)
+    # kms enteros >= 0 para ordenar / buscar; sin kms (NaN) numeric_close descarta el par
+    km = np.where(np.isfinite(kms), np.clip(kms, 0, 2**31 - 1), 0).astype(np.int64)
+    pairs = []
+    for band in range(bands):
+        cols = sig[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        key = (cols * mult).sum(axis=1) ^ (block.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+        order = np.lexsort((km, key))
+        k = key[order]
+        same_prev = k[1:] == k[:-1]
+        if not same_prev.any():
+            continue
+        # (bucket, kms) en un solo int64 ordenado: la ventana de cada fila es un searchsorted
+        group = np.r_[0, np.cumsum(~same_prev)].astype(np.int64)
+        km_sorted = km[order]
+        comp = (group << 32) | km_sorted
+        low = np.maximum(km_sorted - kms_window(km_sorted).astype(np.int64), 0)
+        start = np.searchsorted(comp, (group << 32) | low, side="left")
+        pos = np.arange(len(k))
+        start = np.maximum(start, pos - MAX_PARTNERS)
+        counts = pos - start
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        j = np.repeat(pos, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = np.repeat(start, counts) + offsets
+        # filtro sobre los arrays ya ordenados: i y j quedan cerca en memoria
+        close = numeric_close(kms[order], price[order], i, j)
+        pairs.append(np.stack([order[i[close]], order[j[close]]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    # el mismo par sale en varias bandas: unique sobre i * n + j (1D, mucho más rápido que axis=0)
+    pairs = np.sort(np.concatenate(pairs), axis=1).astype(np.int64)
+    n = np.int64(len(sig))
+    codes = np.unique(pairs[:, 0] * n + pairs[:, 1])
+    return np.stack([codes // n, codes % n], axis=1)
+
+
+def union_find(n: int, pairs: np.ndarray) -> np.ndarray:
+    parent = np.arange(n)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(n)])
+
+
+def numeric_close(kms: np.ndarray, price: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Máscara de pares (i, j) con kms / precio dentro de la tolerancia (el anio ya lo fija el bloque)."""
+    kms_gap = np.abs(kms[i] - kms[j])
+    price_gap = np.abs(price[i] - price[j])
+    return (
+        (kms_gap <= kms_window(np.maximum(kms[i], kms[j])))
+        & (price_gap <= PRICE_TOLERANCE * np.maximum(price[i], price[j]))
+    )
+
+
+# =========================
+# Etapa completa
+# =========================
+def find_near_duplicates(df: pd.DataFrame, threshold: float = THRESHOLD,
+                         num_perm: int = NUM_PERM) -> tuple[np.ndarray, dict]:
+    """
+    df: filas de autos_dataset_limpio.csv (texto). Devuelve (cluster por fila, stats).
+    El id de cluster es la posición de su primera fila.
+    """
+    n = len(df)
+    bands, rows_per_band = choose_bands(threshold, num_perm)
+    stats = {"threshold": threshold, "num_perm": num_perm, "bands": bands, "rows_per_band": rows_per_band}
+    if n == 0:
+        return np.arange(0), {**stats, "candidate_pairs": 0, "verified_pairs": 0}
+
+    rows, hashes = token_hashes(df)
+    sig = minhash_signatures(rows, hashes, n, num_perm)
+    block = pd.factorize(df["marca"] + "|" + df["combustible"] + "|" + df["anio"])[0]
+    kms, price = numeric_columns(df)
+    pairs = candidate_pairs(sig, block, kms, price, bands, rows_per_band)
+
+    # verificación: fracción de minhashes iguales ~ Jaccard (kms / precio ya filtrados)
+    if len(pairs):
+        matches = np.count_nonzero(sig[pairs[:, 0]] == sig[pairs[:, 1]], axis=1)
+        verified = pairs[matches >= threshold * num_perm]
+    else:
+        verified = pairs
+    stats.update({"candidate_pairs": int(len(pairs)), "verified_pairs": int(len(verified))})
+    return union_find(n, verified), stats
+
+
+def collapse_near_duplicates(df: pd.DataFrame, threshold: float = THRESHOLD,
+                             num_perm: int = NUM_PERM) -> tuple[pd.DataFrame, dict]:
+    """Una fila por cluster: la de más extras (aire + vidrio); empate -> la primera."""
+    t0 = time.perf_counter()
+    cluster, stats = find_near_duplicates(df, threshold, num_perm)
+    score = (df["aire"] == "True").to_numpy(int) + (df["vidrio"] == "True").to_numpy(int)
+    ranked = pd.DataFrame({"cluster": cluster, "score": score, "pos": np.arange(len(df))})
+    keep = (
+        ranked.sort_values(["score", "pos"], ascending=[False, True], kind="stable")
+        .drop_duplicates("cluster")["pos"]
+        .sort_values()
+        .to_numpy()
+    )
+    sizes = np.bincount(cluster) if len(cluster) else np.zeros(0, dtype=int)
+    stats.update({
+        "rows_in": int(len(df)),
+        "rows_out": int(len(keep)),
+        "rows_merged": int(len(df) - len(keep)),
+        "clusters_merged": int((sizes > 1).sum()),
+        "largest_cluster": int(sizes.max()) if len(sizes) else 0,
+        "seconds": round(time.perf_counter() - t0, 2),
+    })
+    return df.iloc[keep], stats
+
+
+def stats_path(out_csv: Path) -> Path:
+    return out_csv.with_name(out_csv.stem + ".casi_duplicados.json")
+
+
+def run(in_csv: Path, out_csv: Path, threshold: float = THRESHOLD, num_perm: int = NUM_PERM) -> dict:
+    df = read_raw_frame(in_csv)[FIELDNAMES]
+    kept, stats = collapse_near_duplicates(df, threshold, num_perm)
+    write_frame(out_csv, kept)
+    # un output colapsado ya no es el que --incremental sabe extender
+    clear_state(out_csv)
+    stats_path(out_csv).write_text(json.dumps(stats, indent=2), encoding="utf-8")
+    return stats
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Colapsa casi-duplicados (MinHash/LSH) del CSV limpio")
+    ap.add_argument("--in", dest="in_csv", type=Path, default=OUT_CSV)
+    ap.add_argument("--out", dest="out_csv", type=Path, default=None, help="default: pisa --in")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD,
+                    help="similitud Jaccard mínima para considerar dos avisos el mismo auto")
+    ap.add_argument("--num-perm", type=int, default=NUM_PERM)
+    args = ap.parse_args(argv)
+    if not 0 < args.threshold <= 1:
+        ap.error("--threshold debe estar en (0, 1]")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_csv = args.out_csv or args.in_csv
+    st = run(args.in_csv, out_csv, args.threshold, args.num_perm)
+    print(f"✅ Casi-duplicados (umbral {st['threshold']}, {st['bands']}x{st['rows_per_band']} bandas): "
+          f"{st['rows_in']} -> {st['rows_out']} filas ({st['rows_merged']} unidas en "
+          f"{st['clusters_merged']} clusters) -> {out_csv.resolve()}")
+    print(f"📊 Stats -> {stats_path(out_csv)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
+import argparse
 import csv
+import hashlib
+import json
 import re
+import sqlite3
 import unicodedata
+import warnings
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 IN_CSV = Path("autos_dataset.csv")
 OUT_CSV = Path("autos_dataset_limpio.csv")
 
@@ -18,6 +27,9 @@ BRANDS_RAW = [
 def strip_accents(s: str) -> str:
     if not s:
         return ""
+    if s.isascii():
+        # NFKD no cambia ASCII y no hay marcas combinantes: nada que sacar
+        return s
     return "".join(
         c for c in unicodedata.normalize("NFKD", s)
         if not unicodedata.combining(c)
@@ -32,6 +44,7 @@ def norm(s: str) -> str:
 def norm_key(s: str) -> str:
     return norm(s).lower()
 
+@lru_cache(maxsize=4096)
 def brand_simplify(s: str) -> str:
     """
     Para comparar marcas ignorando guiones/espacios/puntos:
@@ -142,15 +155,31 @@ def compile_brand_patterns(brands_raw):
 
 BRAND_PATTERNS = compile_brand_patterns(BRANDS_RAW)
 
+def compile_brand_matcher(patterns):
+    """
+    Una sola regex con todas las marcas como alternativas, en el mismo orden
+    (más largas primero): re prueba las alternativas en orden y se queda con la
+    primera que matchea, igual que el loop sobre BRAND_PATTERNS pero en una pasada.
+    m.lastgroup dice cuál marca fue.
+    """
+    alts = []
+    displays = {}
+    for i, (b_disp, pat) in enumerate(patterns):
+        name = f"b{i}"
+        alts.append(f"(?P<{name}>{pat.pattern[1:]})")  # sin el "^" de cada una
+        displays[name] = b_disp
+    return re.compile(r"^(?:" + "|".join(alts) + r")", flags=re.IGNORECASE), displays
+
+BRAND_MATCHER, BRAND_BY_GROUP = compile_brand_matcher(BRAND_PATTERNS)
+
 def detect_brand_prefix(modelo_full: str):
     full = norm(modelo_full)
     if not full:
         return "", ""
-    for b_display, pat in BRAND_PATTERNS:
-        m = pat.match(full)
-        if m:
-            rest = full[m.end():].strip()
-            return b_display, rest
+    m = BRAND_MATCHER.match(full)
+    if m:
+        rest = full[m.end():].strip()
+        return BRAND_BY_GROUP[m.lastgroup], rest
     return "", full
 
 def split_model_version_from_full(modelo_full: str):
@@ -176,96 +205,547 @@ def is_invalid_version(version: str) -> bool:
     v = norm_key(version)
     return v in INVALID_VERSION_VALUES
 
-def main():
+FIELDNAMES = [
+    "marca", "modelo", "version",
+    "anio", "kms", "precio_usd",
+    "combustible", "transmision", "direccion",
+    "aire", "vidrio"
+]
+
+def clean_row(r: dict):
+    """
+    Fila cruda del scrape -> (key, score, row_out), o None si se descarta.
+    key: lo que define un duplicado; score: extras (gana el mayor).
+    """
+    marca_csv = norm_key(r.get("marca", ""))  # ej: alfa-romeo
+    modelo_full = norm(r.get("modelo", ""))   # ej: "Alfa Romeo 156 2.4 ..."
+
+    combustible = normalize_combustible(r.get("combustible", ""))
+    transmision = normalize_transmision(r.get("transmision", ""))
+    direccion = normalize_direccion(r.get("direccion", ""))
+
+    aire = parse_bool(r.get("aire", False))
+    vidrio = parse_bool(r.get("cristales", r.get("vidrio", False)))
+
+    anio = safe_int(r.get("anio", ""))
+    kms = safe_int(r.get("kms", ""))
+    precio_usd = safe_int(r.get("precio_usd", ""))
+
+    # mínimos
+    if not marca_csv or not combustible or not modelo_full:
+        return None
+    if anio is None or kms is None or precio_usd is None:
+        return None
+
+    # split
+    brand_text, modelo, version = split_model_version_from_full(modelo_full)
+    if not brand_text or not modelo:
+        return None
+
+    # ✅ ELIMINAR si version es "nan"/vacía/etc
+    if is_invalid_version(version):
+        return None
+
+    # ✅ comparación flexible: "Alfa Romeo" == "alfa-romeo"
+    if brand_simplify(brand_text) != brand_simplify(marca_csv):
+        return None
+
+    row_out = {
+        "marca": marca_csv,
+        "modelo": norm(modelo),
+        "version": norm(version),
+        "anio": anio,
+        "kms": kms,
+        "precio_usd": precio_usd,
+        "combustible": combustible,
+        "transmision": transmision,
+        "direccion": direccion,
+        "aire": aire,
+        "vidrio": vidrio,
+    }
+
+    key = (
+        marca_csv,
+        norm_key(modelo),
+        norm_key(version),
+        anio,
+        kms,
+        precio_usd,
+        combustible,
+        transmision,
+        direccion,
+    )
+
+    return key, extras_score(aire, vidrio), row_out
+
+def iter_clean_rows(in_csv: Path):
+    with in_csv.open("r", encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            cleaned = clean_row(r)
+            if cleaned is not None:
+                yield cleaned
+
+# ======================================================
+# ✅ DEDUPE: gana el mayor extras_score; ante empate, la primera fila.
+# Orden de salida = orden en que apareció cada key por primera vez.
+# ======================================================
+
+def dedupe_memory(cleaned):
     best_by_key = {}
+    for key, score, row_out in cleaned:
+        if key not in best_by_key:
+            best_by_key[key] = (score, row_out)
+        else:
+            prev_score, _ = best_by_key[key]
+            if score > prev_score:
+                best_by_key[key] = (score, row_out)
 
-    with IN_CSV.open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
+    for _, row_out in best_by_key.values():
+        yield row_out
 
-        for r in reader:
-            marca_csv = norm_key(r.get("marca", ""))  # ej: alfa-romeo
-            modelo_full = norm(r.get("modelo", ""))   # ej: "Alfa Romeo 156 2.4 ..."
+# modo disco: sqlite con la key como índice único; la memoria queda acotada por el
+# cache de sqlite y el batch, no por la cantidad de filas del scrape
+DEDUPE_BATCH = 10_000
+SQLITE_CACHE_KB = 64 * 1024
 
-            combustible = normalize_combustible(r.get("combustible", ""))
-            transmision = normalize_transmision(r.get("transmision", ""))
-            direccion = normalize_direccion(r.get("direccion", ""))
+def dedupe_sqlite(cleaned, db_path: Path):
+    """
+    Mismo resultado que dedupe_memory, pero best_by_key vive en disco:
+    - seq (rowid) = orden de la primera aparición; el upsert no lo cambia
+    - ON CONFLICT ... WHERE excluded.score > score: reemplaza solo si mejora
+    - la salida se lee en orden de seq con un cursor (streaming)
+    """
+    db_path = Path(db_path)
+    db_path.unlink(missing_ok=True)
+    con = sqlite3.connect(db_path)
+    try:
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA synchronous = OFF")
+        con.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KB}")
+        con.execute(
+            "CREATE TABLE best (seq INTEGER PRIMARY KEY, k TEXT NOT NULL UNIQUE, "
+            "score INTEGER NOT NULL, row TEXT NOT NULL)"
+        )
+        upsert = (
+            "INSERT INTO best (k, score, row) VALUES (?, ?, ?) "
+            "ON CONFLICT (k) DO UPDATE SET score = excluded.score, row = excluded.row "
+            "WHERE excluded.score > best.score"
+        )
+
+        batch = []
+        for key, score, row_out in cleaned:
+            batch.append((json.dumps(key, ensure_ascii=False), score,
+                          json.dumps([row_out[c] for c in FIELDNAMES], ensure_ascii=False)))
+            if len(batch) >= DEDUPE_BATCH:
+                con.executemany(upsert, batch)
+                batch.clear()
+        if batch:
+            con.executemany(upsert, batch)
+        con.commit()
+
+        for (row,) in con.execute("SELECT row FROM best ORDER BY seq"):
+            yield dict(zip(FIELDNAMES, json.loads(row)))
+    finally:
+        con.close()
+        db_path.unlink(missing_ok=True)
+
+def write_rows(out_csv: Path, rows) -> int:
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with out_csv.open("w", encoding="utf-8-sig", newline="") as out_f:
+        writer = csv.DictWriter(out_f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
 
-            aire = parse_bool(r.get("aire", False))
-            vidrio = parse_bool(r.get("cristales", r.get("vidrio", False)))
+# ======================================================
+# ✅ MOTOR COLUMNAR: mismas reglas, una columna a la vez.
+# Las funciones de arriba se aplican una vez por valor distinto (marca,
+# combustible, modelo completo...) y el resultado se mapea a las filas.
+# ======================================================
 
-            anio = safe_int(r.get("anio", ""))
-            kms = safe_int(r.get("kms", ""))
-            precio_usd = safe_int(r.get("precio_usd", ""))
+def map_unique(col: pd.Series, fn) -> pd.Series:
+    codes, uniques = pd.factorize(col)
+    mapped = np.empty(len(uniques) + 1, dtype=object)  # fn puede devolver tuplas
+    mapped[:] = [fn(u) for u in uniques] + [fn("")]
+    return pd.Series(mapped[codes], index=col.index)  # código -1 (NaN) -> fn("")
 
-            # mínimos
-            if not marca_csv or not combustible or not modelo_full:
-                continue
-            if anio is None or kms is None or precio_usd is None:
-                continue
+def digits_column(col: pd.Series) -> pd.Series:
+    """
+    safe_int en columna, pero como texto: los dígitos sin ceros a la izquierda
+    (lo mismo que escribe str(int(...))); None si no hay dígitos.
+    """
+    digits = col.str.replace(r"[^\d]", "", regex=True)
+    out = digits.str.lstrip("0")
+    out = out.where(out != "", "0")  # "000" -> "0"
+    out = out.where(digits != "", None)
+    # \d también matchea dígitos no ASCII (p.ej. "٣"): esos pasan por int() como safe_int
+    exotic = digits.str.contains(r"[^0-9]", regex=True, na=False)
+    if exotic.any():
+        out[exotic] = digits[exotic].map(lambda d: str(int(d)))
+    return out
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    clean_row + dedupe_memory sobre todo el CSV (leído con dtype=str).
+    Devuelve las filas de salida en el mismo orden, con columnas FIELDNAMES ya en texto.
+    """
+    def col(name, default=""):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+    marca = map_unique(col("marca"), norm_key)
+    modelo_full = map_unique(col("modelo"), norm)
+    combustible = map_unique(col("combustible"), normalize_combustible)
+    transmision = map_unique(col("transmision"), normalize_transmision)
+    direccion = map_unique(col("direccion"), normalize_direccion)
+    aire = map_unique(col("aire", "False"), parse_bool).astype(bool)
+    vidrio_raw = col("cristales") if "cristales" in df.columns else col("vidrio", "False")
+    vidrio = map_unique(vidrio_raw, parse_bool).astype(bool)
+    anio = digits_column(col("anio"))
+    kms = digits_column(col("kms"))
+    precio_usd = digits_column(col("precio_usd"))
+
+    # mínimos
+    keep = (marca != "") & (combustible != "") & (modelo_full != "")
+    keep &= anio.notna() & kms.notna() & precio_usd.notna()
+
+    # split (una vez por modelo completo distinto)
+    split = map_unique(modelo_full.where(keep, ""), split_model_version_from_full)
+    brand_text = split.str[0]
+    modelo = split.str[1]
+    version = split.str[2]
+    keep &= (brand_text != "") & (modelo != "")
+    keep &= ~map_unique(version, is_invalid_version).astype(bool)
+    keep &= map_unique(brand_text, brand_simplify) == map_unique(marca, brand_simplify)
+
+    out = pd.DataFrame({
+        "marca": marca,
+        "modelo": map_unique(modelo, norm),
+        "version": map_unique(version, norm),
+        "anio": anio,
+        "kms": kms,
+        "precio_usd": precio_usd,
+        "combustible": combustible,
+        "transmision": transmision,
+        "direccion": direccion,
+        "aire": aire.map({True: "True", False: "False"}),
+        "vidrio": vidrio.map({True: "True", False: "False"}),
+        "_modelo_key": map_unique(modelo, norm_key),
+        "_version_key": map_unique(version, norm_key),
+        "_score": aire.astype(int) + vidrio.astype(int),
+    })[keep.to_numpy()]
+
+    # dedupe: gana el mayor score (empate -> primera fila); orden = primera aparición de la key
+    key_cols = ["marca", "_modelo_key", "_version_key", "anio", "kms", "precio_usd",
+                "combustible", "transmision", "direccion"]
+    out["_pos"] = np.arange(len(out))
+    out["_first"] = out.groupby(key_cols, sort=False).ngroup()
+    best = (
+        out.sort_values(["_score", "_pos"], ascending=[False, True], kind="stable")
+        .drop_duplicates(key_cols, keep="first")
+        .sort_values("_first", kind="stable")
+    )
+    return best[FIELDNAMES]
 
-            # split
-            brand_text, modelo, version = split_model_version_from_full(modelo_full)
-            if not brand_text or not modelo:
-                continue
+def read_raw_frame(in_csv: Path) -> pd.DataFrame:
+    # todo como texto y sin NaN implícitos: "NA"/"null" tienen que llegar igual que con csv.DictReader
+    kw = dict(dtype=str, keep_default_na=False, index_col=False, encoding="utf-8-sig")
+    try:
+        return pd.read_csv(in_csv, **kw)
+    except pd.errors.ParserError:
+        pass
+    # filas con campos de más: el parser C las rechaza. Igual que csv.DictReader (el motor por
+    # filas), se usan los primeros len(header) campos y el resto se ignora. Parser python: más lento,
+    # solo cuando hace falta.
+    n_fields = len(read_header(in_csv)[0])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.ParserWarning)
+        return pd.read_csv(in_csv, engine="python", on_bad_lines=lambda fields: fields[:n_fields], **kw)
+
+def write_frame(out_csv: Path, df: pd.DataFrame) -> int:
+    """Mismo formato que write_rows (csv.DictWriter: \\r\\n, utf-8-sig, quoting mínimo)."""
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", encoding="utf-8-sig", newline="") as out_f:
+        writer = csv.writer(out_f)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(zip(*(df[c].tolist() for c in FIELDNAMES)))
+    return len(df)
 
-            # ✅ ELIMINAR si version es "nan"/vacía/etc
-            if is_invalid_version(version):
-                continue
+# ======================================================
+# ✅ INCREMENTAL: solo las filas agregadas al final del CSV desde la última corrida.
+# Estado junto al output:
+#   <out>.state.json        -> watermark (bytes procesados) + sha256 de todo ese prefijo
+#   <out>.fingerprints.npy  -> huellas de las filas crudas ya vistas (re-publicaciones idénticas)
+# Si el CSV no es una extensión del anterior (o cambió la limpieza) se reconstruye todo.
+# ======================================================
 
-            # ✅ comparación flexible: "Alfa Romeo" == "alfa-romeo"
-            if brand_simplify(brand_text) != brand_simplify(marca_csv):
-                continue
+# subir cuando cambien las reglas de limpieza: invalida el estado incremental
+CLEAN_VERSION = 1
+
+def state_paths(out_csv: Path) -> tuple[Path, Path]:
+    return (out_csv.with_name(out_csv.stem + ".state.json"),
+            out_csv.with_name(out_csv.stem + ".fingerprints.npy"))
+
+def prefix_hasher(path: Path, end: int, block: int = 1 << 20):
+    """
+    sha256 de los bytes [0, end) del CSV. Lee todo el prefijo (sin parsear, secuencial):
+    es la única forma de detectar una fila reescrita en cualquier parte de lo ya procesado.
+    Devuelve el hasher para seguir actualizándolo con las líneas nuevas.
+    """
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        remaining = end
+        while remaining > 0:
+            buf = f.read(min(block, remaining))
+            if not buf:
+                break
+            h.update(buf)
+            remaining -= len(buf)
+    return h
+
+def clear_state(out_csv: Path) -> None:
+    """
+    Borra el estado incremental de out_csv. Cualquier corrida que reescribe el output por
+    otro camino (completa, --engine columns, casi-duplicados) lo deja inválido: la próxima
+    --incremental tiene que reconstruir todo en vez de mergear sobre ese output.
+    """
+    for path in state_paths(out_csv):
+        path.unlink(missing_ok=True)
+
+def row_fingerprint(fields: list[str]) -> int:
+    digest = hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
 
-            row_out = {
-                "marca": marca_csv,
-                "modelo": norm(modelo),
-                "version": norm(version),
-                "anio": anio,
-                "kms": kms,
-                "precio_usd": precio_usd,
-                "combustible": combustible,
-                "transmision": transmision,
-                "direccion": direccion,
-                "aire": aire,
-                "vidrio": vidrio,
-            }
+def read_header(in_csv: Path) -> tuple[list[str], int]:
+    """Nombres de columna (como csv.DictReader con utf-8-sig) + bytes del header."""
+    with in_csv.open("rb") as f:
+        line = f.readline()
+    return next(csv.reader([line.decode("utf-8-sig")])), len(line)
 
+def load_state(in_csv: Path, out_csv: Path):
+    """
+    (estado de la corrida anterior, hasher del prefijo procesado), o None si no sirve
+    (no existe, otro input, CSV achicado o con el prefijo reescrito...).
+    """
+    state_path, fp_path = state_paths(out_csv)
+    if not state_path.exists() or not fp_path.exists() or not out_csv.exists():
+        return None
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    offset = state.get("offset", 0)
+    if (
+        state.get("clean_version") != CLEAN_VERSION
+        or state.get("input") != str(in_csv.resolve())
+        or in_csv.stat().st_size < offset
+        or state.get("header") != read_header(in_csv)[0]
+    ):
+        return None
+    hasher = prefix_hasher(in_csv, offset)
+    if state.get("prefix_sha256") != hasher.hexdigest():
+        return None
+    return state, hasher
+
+def save_state(in_csv: Path, out_csv: Path, header: list[str], offset: int, prefix_sha256: str,
+               fingerprints: np.ndarray) -> None:
+    state_path, fp_path = state_paths(out_csv)
+    np.save(fp_path, fingerprints)
+    state_path.write_text(json.dumps({
+        "clean_version": CLEAN_VERSION,
+        "input": str(in_csv.resolve()),
+        "header": header,
+        "offset": offset,
+        "prefix_sha256": prefix_sha256,
+        "rows_seen": int(len(fingerprints)),
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def iter_new_records(in_csv: Path, header: list[str], offset: int, pos: list, hasher=None):
+    """
+    Filas crudas desde el byte offset, como dict (igual que csv.DictReader) + sus campos.
+    Solo líneas completas: si el scraper está escribiendo, la última queda para la próxima.
+    pos[0] termina en el byte hasta donde se procesó; hasher (si viene) suma esas líneas.
+    """
+    def complete_lines(f):
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            pos[0] += len(line)
+            if hasher is not None:
+                hasher.update(line)
+            yield line.decode("utf-8")
+
+    pos[0] = offset
+    n_fields = len(header)
+    with in_csv.open("rb") as f:
+        f.seek(offset)
+        for fields in csv.reader(complete_lines(f)):
+            if not fields:
+                continue
+            r = dict(zip(header, fields))
+            if len(fields) > n_fields:
+                r[None] = fields[n_fields:]
+            elif len(fields) < n_fields:
+                for k in header[len(fields):]:
+                    r[k] = None
+            yield r, fields
+
+def load_best_by_key(out_csv: Path) -> dict:
+    """best_by_key reconstruido desde el output anterior (mismas keys/score que clean_row)."""
+    best_by_key = {}
+    with out_csv.open("r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
             key = (
-                marca_csv,
-                norm_key(modelo),
-                norm_key(version),
-                anio,
-                kms,
-                precio_usd,
-                combustible,
-                transmision,
-                direccion,
+                row["marca"],
+                norm_key(row["modelo"]),
+                norm_key(row["version"]),
+                int(row["anio"]),
+                int(row["kms"]),
+                int(row["precio_usd"]),
+                row["combustible"],
+                row["transmision"],
+                row["direccion"],
             )
+            best_by_key[key] = (extras_score(row["aire"] == "True", row["vidrio"] == "True"), row)
+    return best_by_key
 
-            score = extras_score(aire, vidrio)
+def append_rows(out_csv: Path, rows) -> None:
+    with out_csv.open("a", encoding="utf-8", newline="") as out_f:
+        csv.DictWriter(out_f, fieldnames=FIELDNAMES).writerows(rows)
 
-            if key not in best_by_key:
-                best_by_key[key] = (score, row_out)
-            else:
-                prev_score, _ = best_by_key[key]
-                if score > prev_score:
-                    best_by_key[key] = (score, row_out)
-
-    rows = [v[1] for v in best_by_key.values()]
-
-    OUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_CSV.open("w", encoding="utf-8-sig", newline="") as out_f:
-        fieldnames = [
-            "marca", "modelo", "version",
-            "anio", "kms", "precio_usd",
-            "combustible", "transmision", "direccion",
-            "aire", "vidrio"
-        ]
-        writer = csv.DictWriter(out_f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+def clean_incremental(in_csv: Path, out_csv: Path) -> dict:
+    """
+    Procesa solo lo agregado al CSV desde la última corrida y lo mergea al output con
+    las mismas reglas de dedupe (el resultado es el mismo que una corrida completa).
+    - sin bytes nuevos: no lee nada más
+    - keys nuevas sin reemplazos: se agregan al final del output
+    - si alguna fila nueva mejora el score de una key existente: se reescribe el output
+    """
+    header, header_len = read_header(in_csv)
+    loaded = load_state(in_csv, out_csv)
+    if loaded is None:
+        offset, seen, best_by_key = header_len, np.empty(0, dtype=np.uint64), {}
+        hasher = prefix_hasher(in_csv, header_len)
+        mode = "completo"
+    else:
+        state, hasher = loaded
+        offset = state["offset"]
+        mode = "incremental"
+        if in_csv.stat().st_size == offset:
+            return {"mode": mode, "new_rows": 0, "skipped": 0, "added": 0, "replaced": 0,
+                    "total": None, "rewritten": False, "pending_bytes": 0}
+        seen = np.load(state_paths(out_csv)[1])
+        best_by_key = load_best_by_key(out_csv)
+
+    pos = [offset]
+    new_fps, added, n_new, n_skipped, n_replaced = [], {}, 0, 0, 0
+    batch_fps = set()
+    for r, fields in iter_new_records(in_csv, header, offset, pos, hasher):
+        n_new += 1
+        fp = row_fingerprint(fields)
+        # misma fila cruda que una ya vista -> misma key y score: no cambia el resultado
+        if fp in batch_fps or (len(seen) and seen[np.searchsorted(seen, np.uint64(fp)) % len(seen)] == fp):
+            n_skipped += 1
+            continue
+        batch_fps.add(fp)
+        new_fps.append(fp)
 
-    print(f"✅ Limpio + dedupe + fixes '-' + gnc->nafta-gnc + sin version NaN: {len(rows)} filas -> {OUT_CSV.resolve()}")
+        cleaned = clean_row(r)
+        if cleaned is None:
+            continue
+        key, score, row_out = cleaned
+        if key not in best_by_key:
+            best_by_key[key] = (score, row_out)
+            added[key] = row_out
+        elif score > best_by_key[key][0]:
+            best_by_key[key] = (score, row_out)
+            if key in added:
+                added[key] = row_out  # key nueva de esta corrida: sigue yendo al final
+            else:
+                n_replaced += 1
+
+    rewritten = mode == "completo" or n_replaced > 0
+    if rewritten:
+        write_rows(out_csv, (row for _, row in best_by_key.values()))
+    elif added:
+        append_rows(out_csv, added.values())
+
+    seen = np.union1d(seen, np.array(new_fps, dtype=np.uint64))
+    save_state(in_csv, out_csv, header, pos[0], hasher.hexdigest(), seen)
+    # última línea sin \n: no se procesa (puede estar a medio escribir), queda para la próxima corrida
+    pending = in_csv.stat().st_size - pos[0]
+    return {"mode": mode, "new_rows": n_new, "skipped": n_skipped, "added": len(added),
+            "replaced": n_replaced, "total": len(best_by_key), "rewritten": rewritten,
+            "pending_bytes": pending}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Limpieza + dedupe de autos_dataset.csv")
+    ap.add_argument("--in", dest="in_csv", type=Path, default=IN_CSV)
+    ap.add_argument("--out", dest="out_csv", type=Path, default=OUT_CSV)
+    ap.add_argument("--engine", choices=("rows", "columns"), default="rows",
+                    help="columns: pandas, columna a columna (más rápido, carga todo el CSV en memoria)")
+    ap.add_argument("--dedupe", choices=("memory", "disk"), default="memory",
+                    help="disk: dedupe en sqlite (scrapes más grandes que la RAM; solo --engine rows)")
+    ap.add_argument("--tmp-dir", type=Path, default=None,
+                    help="dónde crear la base temporal de --dedupe disk (default: junto a --out)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="procesar solo las filas agregadas al CSV desde la última corrida")
+    ap.add_argument("--casi-duplicados", dest="near_threshold", type=float, nargs="?", const=0.8, default=None,
+                    metavar="UMBRAL",
+                    help="después del dedupe exacto, colapsar casi-duplicados (MinHash/LSH, default 0.8)")
+    args = ap.parse_args(argv)
+    if args.near_threshold is not None and not 0 < args.near_threshold <= 1:
+        ap.error("--casi-duplicados debe estar en (0, 1]")
+    if args.near_threshold is not None and args.incremental:
+        ap.error("--casi-duplicados no se puede combinar con --incremental")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.incremental:
+        if args.engine != "rows" or args.dedupe != "memory":
+            raise SystemExit("❌ --incremental usa el motor por filas con dedupe en memoria")
+        st = clean_incremental(args.in_csv, args.out_csv)
+        if st["pending_bytes"]:
+            print(f"⚠️ {args.in_csv}: la última línea no termina en salto de línea ({st['pending_bytes']} bytes); "
+                  f"no se procesó, se toma en la próxima corrida cuando esté completa")
+        if st["new_rows"] == 0:
+            print(f"✅ Sin filas nuevas en {args.in_csv} (nada que procesar)")
+            return
+        print(f"✅ Limpieza {st['mode']}: {st['new_rows']} filas nuevas ({st['skipped']} repetidas), "
+              f"+{st['added']} keys, {st['replaced']} reemplazos -> {st['total']} filas "
+              f"({'reescrito' if st['rewritten'] else 'agregadas al final'}) -> {args.out_csv.resolve()}")
+        return
+
+    if args.engine == "columns":
+        if args.dedupe == "disk":
+            raise SystemExit("❌ --dedupe disk solo está disponible con --engine rows")
+        n = write_frame(args.out_csv, clean_frame(read_raw_frame(args.in_csv)))
+        clear_state(args.out_csv)
+        print(f"✅ Limpio + dedupe + fixes '-' + gnc->nafta-gnc + sin version NaN: {n} filas -> {args.out_csv.resolve()}")
+        near_duplicates(args)
+        return
+
+    cleaned = iter_clean_rows(args.in_csv)
+    if args.dedupe == "disk":
+        tmp_dir = args.tmp_dir or args.out_csv.resolve().parent
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        rows = dedupe_sqlite(cleaned, tmp_dir / f"{args.out_csv.stem}.dedupe.sqlite")
+    else:
+        rows = dedupe_memory(cleaned)
+
+    n = write_rows(args.out_csv, rows)
+    clear_state(args.out_csv)
+    print(f"✅ Limpio + dedupe + fixes '-' + gnc->nafta-gnc + sin version NaN: {n} filas -> {args.out_csv.resolve()}")
+    near_duplicates(args)
+
+def near_duplicates(args) -> None:
+    if args.near_threshold is None:
+        return
+    from casi_duplicados import run, stats_path
+
+    st = run(args.out_csv, args.out_csv, threshold=args.near_threshold)
+    print(f"✅ Casi-duplicados (umbral {st['threshold']}): {st['rows_merged']} filas unidas en "
+          f"{st['clusters_merged']} clusters -> {st['rows_out']} filas ({stats_path(args.out_csv)})")
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,37 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+import argparse
+import copy
+import hashlib
+import json
+import shutil
+import time
+from datetime import datetime
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import joblib
-import unicodedata
+from joblib import Parallel, delayed, effective_n_jobs
+import scipy.sparse as sp
 
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.ensemble import GradientBoostingRegressor
+import sklearn
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (habilita HalvingRandomSearchCV)
+from sklearn.model_selection import train_test_split, HalvingRandomSearchCV, PredefinedSplit
+from sklearn.metrics import make_scorer
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_pinball_loss
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+from normalizacion import norm_series, bool01_series
+from perf import measure
+from predict import encode_categories, build_features
 
 # ===== PATHS =====
 BASE_DIR = Path(__file__).resolve().parent.parent
 CSV_PATH = BASE_DIR / "pipelines" / "autos_dataset_limpio.csv"
 OUT_PATH = BASE_DIR / "api" / "model" / "modelo_rango_autos.joblib"
+# X/y/preproc ya preparados, uno por (hash del CSV + constantes de preprocesamiento)
+CACHE_DIR = BASE_DIR / "pipelines" / ".cache" / "ml_table"
 
 # ===== LIMITES =====
 YEAR_REF = 2026
@@ -27,6 +44,94 @@ MAX_KMS = 600_000
 MIN_PRICE_USD = 1_000
 MAX_PRICE_USD = 700_000
 
+# subir si cambia la lógica de prepare_ml_table (invalida el cache)
+PREP_VERSION = 2
+
+# dtypes declarados al leer el CSV: texto -> category (cada valor distinto se guarda
+# una vez), numéricos -> float32 (precio/año/kms enteros entran exactos)
+RAW_DTYPES = {
+    "marca": "category",
+    "modelo": "category",
+    "version": "category",
+    "combustible": "category",
+    "transmision": "category",
+    "direccion": "category",
+    "aire": "category",
+    "vidrio": "category",
+    "cristales": "category",
+    "anio": "float32",
+    "kms": "float32",
+    "precio_usd": "float32",
+}
+
+# ===== ENTRENAMIENTO =====
+# cuantiles a entrenar (se pueden sumar P05/P25/P75/P95 desde la CLI: --quantiles)
+QUANTILES = [0.10, 0.50, 0.90]
+# los que usa la API (api/app.py): cualquier --quantiles tiene que incluirlos
+REQUIRED_QUANTILES = (0.10, 0.50, 0.90)
+N_JOBS = -1  # procesos para entrenar cuantiles en paralelo (-1 = todos los cores)
+
+# backend "gbr": GradientBoostingRegressor exacto + freq/one-hot (el original)
+# backend "hist": HistGradientBoostingRegressor (multi-thread) + categóricas nativas
+BACKENDS = ("gbr", "hist")
+BACKEND = "gbr"
+
+GBR_PARAMS = {
+    "n_estimators": 1200,
+    "learning_rate": 0.03,
+    "max_depth": 4,
+    "subsample": 0.9,
+}
+
+HIST_PARAMS = {
+    "max_iter": 1200,
+    "learning_rate": 0.03,
+    "max_leaf_nodes": 16,  # ~ árboles de profundidad 4 como en gbr
+    "min_samples_leaf": 20,
+}
+# early stopping (--early-stopping, ambos backends): corta cuando la pérdida en
+# validación no mejora
+EARLY_STOPPING = {
+    "validation_fraction": 0.1,
+    "n_iter_no_change": 50,
+}
+
+# ===== ACTUALIZACION INCREMENTAL (--incremental) =====
+EXTRA_STAGES = 200      # etapas de boosting nuevas por actualización
+RECENT_FRAC = 0.20      # cola del CSV base que se re-usa junto con los avisos nuevos
+MAX_DEGRADATION = 0.02  # empeoramiento relativo de pinball loss tolerado en el holdout
+
+# ===== TUNING (--tune) =====
+# successive halving: muchos candidatos con pocas filas, los mejores siguen con más
+TUNE_GRID = {
+    "gbr": {
+        "n_estimators": [300, 600, 1200, 2000],
+        "learning_rate": [0.01, 0.03, 0.05, 0.1],
+        "max_depth": [3, 4, 5, 6],
+        "subsample": [0.7, 0.8, 0.9, 1.0],
+    },
+    "hist": {
+        "max_iter": [300, 600, 1200, 2000],
+        "learning_rate": [0.01, 0.03, 0.05, 0.1],
+        "max_leaf_nodes": [8, 16, 31, 63],
+        "min_samples_leaf": [10, 20, 50],
+    },
+}
+TUNE_CANDIDATES = 48
+TUNE_FACTOR = 3
+VAL_FRACTION = 0.20  # validación fija (sale del train, el test queda intacto)
+
+# categóricas nativas del backend hist
+CAT_COLS = ["marca", "modelo", "version", "combustible", "transmision", "direccion"]
+# HistGradientBoosting acepta como mucho max_bins (255) categorías por feature:
+# nos quedamos con las más frecuentes, el resto cae como "missing"
+MAX_CAT_LEVELS = 255
+
+# truncate_stages recorta HistGradientBoosting por su atributo privado _predictors
+# (n_iter_ es una property = len(_predictors)). Verificado en 1.5 (requirements.txt) y 1.9:
+# fuera de ese rango se corta el entrenamiento en vez de guardar un bundle roto.
+HIST_TRUNCATE_SKLEARN = ((1, 5), (1, 9))
+
 
 def safe_numeric(df: pd.DataFrame, cols: list[str]) -> None:
     for c in cols:
@@ -34,71 +139,80 @@ def safe_numeric(df: pd.DataFrame, cols: list[str]) -> None:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
 
-def strip_accents(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s)
-    return "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
+def read_training_csv(path: Path) -> pd.DataFrame:
+    """Lee solo las columnas que usa el modelo, con dtypes compactos (ver RAW_DTYPES)."""
+    return pd.read_csv(path, usecols=lambda c: c in RAW_DTYPES, dtype=RAW_DTYPES)
 
 
-def norm_text(s: str) -> str:
+def to_matrix(X: pd.DataFrame):
     """
-    Normalización consistente:
-    - quita acentos
-    - lower
-    - guiones -> espacio
-    - colapsa espacios
+    DataFrame -> matriz float32 para sklearn:
+    - con one-hot sparse: CSC armada columna por columna (índices int32, sin
+      pasar por COO/hstack, que duplican la matriz varias veces). GradientBoosting
+      entrena sobre CSC, así que no la vuelve a convertir.
+    - sin columnas sparse: ndarray
     """
-    if s is None:
-        return ""
-    s = str(s).replace("–", "-").replace("—", "-")
-    s = strip_accents(s)
-    s = s.lower().strip()
-    s = s.replace("-", " ")
-    s = " ".join(s.split())
-    return s
+    if not any(isinstance(dt, pd.SparseDtype) for dt in X.dtypes):
+        return X.to_numpy(dtype=np.float32)
 
+    indices = []
+    data = []
+    indptr = [0]
+    for col in X.columns:
+        arr = X[col].array
+        if isinstance(arr, pd.arrays.SparseArray):
+            rows = arr.sp_index.indices
+            vals = arr.sp_values
+            if arr.fill_value != 0:
+                raise ValueError(f"columna sparse con fill_value != 0: {col}")
+        else:
+            v = np.asarray(arr, dtype=np.float32)
+            rows = np.flatnonzero(v)
+            vals = v[rows]
+        indices.append(rows.astype(np.int32, copy=False))
+        data.append(vals.astype(np.float32, copy=False))
+        indptr.append(indptr[-1] + len(rows))
 
-def to_bool01(x) -> int:
-    s = norm_text(x)
-    if s in {"true", "verdadero", "1", "si", "sí", "yes", "y"}:
-        return 1
-    if s in {"false", "falso", "0", "no", "n"}:
-        return 0
-    return 0
+    return sp.csc_matrix(
+        (np.concatenate(data), np.concatenate(indices), np.asarray(indptr, dtype=np.int64)),
+        shape=X.shape,
+    )
 
 
-def prepare_ml_table(df: pd.DataFrame):
+def prepare_ml_table(df: pd.DataFrame, backend: str = BACKEND, sparse: bool = True):
+    """
+    Filtra, normaliza y arma X/y/preproc. Con `sparse` (backend gbr) las one-hot
+    quedan como columnas SparseDtype: solo se guarda el 1 de cada fila.
+    """
     # --- numéricos ---
     safe_numeric(df, ["precio_usd", "anio", "kms"])
 
     # --- bools a 0/1 ---
     if "aire" in df.columns:
-        df["aire"] = df["aire"].apply(to_bool01).astype(int)
+        df["aire"] = bool01_series(df["aire"])
     else:
         df["aire"] = 0
 
     if "vidrio" in df.columns:
-        df["vidrio"] = df["vidrio"].apply(to_bool01).astype(int)
+        df["vidrio"] = bool01_series(df["vidrio"])
     elif "cristales" in df.columns:
-        df["vidrio"] = df["cristales"].apply(to_bool01).astype(int)
+        df["vidrio"] = bool01_series(df["cristales"])
     else:
         df["vidrio"] = 0
 
-    # --- filtros mínimos ---
-    df = df[df["precio_usd"].notna()].copy()
-    df = df[df["precio_usd"].between(MIN_PRICE_USD, MAX_PRICE_USD)].copy()
-    df = df[df["anio"].between(MIN_YEAR, MAX_YEAR)].copy()
-    df = df[df["kms"].between(0, MAX_KMS)].copy()
+    # --- filtros mínimos (una sola máscara -> una sola copia) ---
+    mask = (
+        df["precio_usd"].between(MIN_PRICE_USD, MAX_PRICE_USD)
+        & df["anio"].between(MIN_YEAR, MAX_YEAR)
+        & df["kms"].between(0, MAX_KMS)
+    )
+    keep = [c for c in df.columns if c in RAW_DTYPES and c != "cristales"]
+    df = df.loc[mask, keep]
 
     # --- normalizar categóricas reales del CSV ---
-    cat_cols = ["marca", "modelo", "version", "combustible", "transmision", "direccion"]
-    for c in cat_cols:
+    for c in CAT_COLS:
         if c in df.columns:
-            df[c] = df[c].map(norm_text)
+            df[c] = norm_series(df[c])
         else:
             df[c] = ""
 
@@ -107,27 +221,32 @@ def prepare_ml_table(df: pd.DataFrame):
     df["edad"] = df["edad"].clip(lower=0)  # por si aparece anio==YEAR_REF
     df["kms_por_anio"] = df["kms"] / df["edad"].replace(0, 1)
 
+    if backend == "hist":
+        return _hist_table(df)
+    if backend != "gbr":
+        raise ValueError(f"backend desconocido: {backend!r} (opciones: {', '.join(BACKENDS)})")
+
     # --- frecuencia (guardar mapas para predict) ---
     freq_maps = {}
     for col in ["marca", "modelo", "version"]:
         vc = df[col].value_counts()
-        freq_maps[col] = vc.to_dict()
-        df[col + "_freq"] = df[col].map(vc).fillna(0).astype(int)
+        vc = vc[vc > 0]  # las categóricas listan también categorías sin filas
+        freq_maps[col] = {k: int(v) for k, v in vc.items()}
+        df[col + "_freq"] = df[col].map(vc).fillna(0).astype(np.int32)
 
     # --- one-hot (más estable) ---
     onehot_cols = ["marca", "combustible", "transmision", "direccion"]
     onehot_cols = [c for c in onehot_cols if c in df.columns]
 
     # ✅ drop_first=False para estabilidad y para que sea más fácil alinear columnas en la API
-    df_ml = pd.get_dummies(df, columns=onehot_cols, drop_first=False)
-
-    onehot_feature_cols = [
-        c for c in df_ml.columns
-        if c.startswith("marca_")
-        or c.startswith("combustible_")
-        or c.startswith("transmision_")
-        or c.startswith("direccion_")
-    ]
+    if sparse:
+        df_ml = pd.get_dummies(df, columns=onehot_cols, drop_first=False, sparse=True, dtype=np.float32)
+    else:
+        df_ml = pd.get_dummies(df, columns=onehot_cols, drop_first=False)
+
+    # solo las columnas que creó get_dummies (filtrar por prefijo "marca_" también
+    # agarraba "marca_freq" y la duplicaba en features)
+    onehot_feature_cols = [c for c in df_ml.columns if c not in df.columns]
 
     # --- features finales ---
     base_features = [
@@ -138,21 +257,30 @@ def prepare_ml_table(df: pd.DataFrame):
     base_features = [c for c in base_features if c in df_ml.columns]
     features = base_features + onehot_feature_cols
 
-    X = df_ml[features].copy()
-    y = df_ml["precio_usd"].copy()
+    X = df_ml[features]
+    y = df_ml["precio_usd"].astype(np.float64)
+
+    preproc = _base_preproc()
+    preproc.update({
+        "features": features,
+        "x_columns": X.columns.tolist(),  # ✅ clave para reindex en predict
+        "freq_maps": freq_maps,
+        "onehot_cols": onehot_cols,
+        "onehot_feature_cols": onehot_feature_cols,
+    })
+
+    return X, y, preproc
+
 
-    preproc = {
+def _base_preproc() -> dict:
+    return {
+        "backend": "gbr",
         "year_ref": YEAR_REF,
         "min_year": MIN_YEAR,
         "max_year": MAX_YEAR,
         "max_kms": MAX_KMS,
         "min_price_usd": MIN_PRICE_USD,
         "max_price_usd": MAX_PRICE_USD,
-        "features": features,
-        "x_columns": X.columns.tolist(),  # ✅ clave para reindex en predict
-        "freq_maps": freq_maps,
-        "onehot_cols": onehot_cols,
-        "onehot_feature_cols": onehot_feature_cols,
         "text_norm": "lower+no_accents+hyphen_to_space+collapse_spaces",
         "bool_norm": "true/verdadero/1/si => 1 else 0",
         "schema": {
@@ -163,13 +291,406 @@ def prepare_ml_table(df: pd.DataFrame):
         }
     }
 
+
+def _hist_table(df: pd.DataFrame):
+    """
+    Variante para HistGradientBoosting: las categóricas van como códigos enteros
+    (posición en cat_vocab) y el modelo las trata como categóricas nativas.
+    Valores fuera del vocabulario -> NaN (rama "missing" del árbol).
+    """
+    cat_vocab = {}
+    for col in CAT_COLS:
+        vc = df[col].value_counts()
+        vc = vc[(vc > 0) & (vc.index != "")]
+        cat_vocab[col] = vc.index[:MAX_CAT_LEVELS].tolist()
+
+    numeric_features = ["anio", "edad", "kms", "kms_por_anio", "aire", "vidrio"]
+    features = numeric_features + CAT_COLS
+
+    X = df[numeric_features].astype(np.float32)
+    X = X.join(encode_categories(df, cat_vocab).astype(np.float32))
+    y = df["precio_usd"].astype(np.float64)
+
+    preproc = _base_preproc()
+    preproc.update({
+        "backend": "hist",
+        "features": features,
+        "x_columns": features,
+        "freq_maps": {},
+        "cat_cols": CAT_COLS,
+        "cat_vocab": cat_vocab,
+    })
+
+    return X, y, preproc
+
+
+# =========================
+# Cache de tablas preparadas
+# =========================
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def prep_cache_key(csv_path: Path, backend: str) -> str:
+    """Hash del contenido del CSV + todo lo que cambia el resultado de prepare_ml_table."""
+    consts = {
+        "prep_version": PREP_VERSION,
+        "backend": backend,
+        "year_ref": YEAR_REF,
+        "min_year": MIN_YEAR,
+        "max_year": MAX_YEAR,
+        "max_kms": MAX_KMS,
+        "min_price_usd": MIN_PRICE_USD,
+        "max_price_usd": MAX_PRICE_USD,
+        "cat_cols": CAT_COLS,
+        "max_cat_levels": MAX_CAT_LEVELS,
+    }
+    h = hashlib.sha256(file_sha256(csv_path).encode())
+    h.update(json.dumps(consts, sort_keys=True).encode())
+    return h.hexdigest()[:32]
+
+
+def save_prepared(cache_dir: Path, X: pd.DataFrame, y: pd.Series, preproc: dict) -> None:
+    """
+    Formato columnar: un .npy por columna (dtype original) + y/index + preproc.
+    Se escribe en un dir temporal y se renombra, así nunca queda un cache a medias.
+    """
+    tmp = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    layout = []
+    for i, col in enumerate(X.columns):
+        arr = X[col].array
+        if isinstance(arr, pd.arrays.SparseArray):
+            # one-hot sparse: posiciones + valores no-cero
+            np.save(tmp / f"x{i:04d}.idx.npy", arr.sp_index.indices)
+            np.save(tmp / f"x{i:04d}.val.npy", arr.sp_values)
+            layout.append({"name": col, "sparse": True})
+        else:
+            np.save(tmp / f"x{i:04d}.npy", X[col].to_numpy())
+            layout.append({"name": col, "sparse": False})
+    np.save(tmp / "y.npy", y.to_numpy())
+    np.save(tmp / "index.npy", X.index.to_numpy())
+    (tmp / "columns.json").write_text(json.dumps(layout), encoding="utf-8")
+    joblib.dump(preproc, tmp / "preproc.joblib")
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    tmp.rename(cache_dir)
+
+
+def _load_column(cache_dir: Path, i: int, spec: dict, n: int):
+    if not spec["sparse"]:
+        return np.load(cache_dir / f"x{i:04d}.npy")
+    values = np.load(cache_dir / f"x{i:04d}.val.npy")
+    rows = np.load(cache_dir / f"x{i:04d}.idx.npy")
+    col = sp.csc_matrix((values, (rows, np.zeros_like(rows))), shape=(n, 1))
+    return pd.arrays.SparseArray.from_spmatrix(col)
+
+
+def load_prepared(cache_dir: Path):
+    layout = json.loads((cache_dir / "columns.json").read_text(encoding="utf-8"))
+    index = pd.Index(np.load(cache_dir / "index.npy"))
+    X = pd.DataFrame(
+        {spec["name"]: _load_column(cache_dir, i, spec, len(index)) for i, spec in enumerate(layout)},
+        index=index,
+    )
+    y = pd.Series(np.load(cache_dir / "y.npy"), index=index, name="precio_usd")
+    preproc = joblib.load(cache_dir / "preproc.joblib")
+    return X, y, preproc
+
+
+def prepare_cached(csv_path: Path, backend: str = BACKEND, use_cache: bool = True, sink: list | None = None):
+    """
+    read_csv + prepare_ml_table, salteando ambos si ya hay cache para este CSV/config.
+    `sink` recibe el tiempo/memoria de cada etapa (ver perf.measure).
+    """
+    cache_dir = CACHE_DIR / prep_cache_key(csv_path, backend) if use_cache else None
+    if cache_dir is not None and (cache_dir / "preproc.joblib").exists():
+        with measure("cache load", sink) as stats:
+            X, y, preproc = load_prepared(cache_dir)
+        print(f"⚡ Tabla preparada desde cache ({stats['wall_s']:.2f}s): {cache_dir.name}")
+        return X, y, preproc
+
+    with measure("csv read", sink):
+        df = read_training_csv(csv_path)
+    with measure("prepare_ml_table", sink):
+        X, y, preproc = prepare_ml_table(df, backend=backend)
+    del df
+
+    if cache_dir is not None:
+        with measure("cache save", sink):
+            save_prepared(cache_dir, X, y, preproc)
     return X, y, preproc
 
 
-def main():
-    df = pd.read_csv(CSV_PATH)
+def save_holdout(csv_path: Path, index: pd.Index, out_csv: Path) -> None:
+    """
+    Guarda las filas CRUDAS del CSV cuyo número de fila está en `index`
+    (prepare_ml_table conserva el RangeIndex de read_csv al filtrar).
+    """
+    keep = set(int(i) for i in index)
+    rows = pd.read_csv(csv_path, skiprows=lambda i: i != 0 and (i - 1) not in keep)
+    rows.to_csv(out_csv, index=False)
+
+
+def qlabel(q: float) -> str:
+    return f"P{round(q * 100):02d}"
+
+
+def make_quantile_model(q: float, backend: str = BACKEND, early_stopping: bool = False):
+    if backend == "hist":
+        params = dict(HIST_PARAMS)
+        if early_stopping:
+            params.update(early_stopping=True, **EARLY_STOPPING)
+        else:
+            params["early_stopping"] = False
+        return HistGradientBoostingRegressor(
+            loss="quantile",
+            quantile=q,
+            categorical_features=CAT_COLS,
+            random_state=42,
+            **params,
+        )
+
+    params = dict(GBR_PARAMS)
+    if early_stopping:
+        params.update(n_iter_no_change=EARLY_STOPPING["n_iter_no_change"],
+                      validation_fraction=EARLY_STOPPING["validation_fraction"])
+    return GradientBoostingRegressor(
+        loss="quantile",
+        alpha=q,
+        random_state=42,
+        **params,
+    )
+
+
+def n_stages(model) -> int:
+    if isinstance(model, HistGradientBoostingRegressor):
+        return int(model.n_iter_)
+    return int(model.n_estimators_)
 
-    X, y, preproc = prepare_ml_table(df)
+
+def check_hist_truncate_support() -> None:
+    version = tuple(int(p) for p in sklearn.__version__.split(".")[:2])
+    lo, hi = HIST_TRUNCATE_SKLEARN
+    if not lo <= version <= hi:
+        raise RuntimeError(
+            f"truncate_stages (hist) usa internos de scikit-learn verificados en "
+            f"{lo[0]}.{lo[1]}-{hi[0]}.{hi[1]}; instalado {sklearn.__version__}. "
+            "Verificar el recorte (tests/test_model.py) y actualizar HIST_TRUNCATE_SKLEARN."
+        )
+
+
+def truncate_stages(model, k: int) -> None:
+    """Deja solo las primeras k etapas del ensemble (in place)."""
+    if isinstance(model, HistGradientBoostingRegressor):
+        check_hist_truncate_support()
+        model._predictors = model._predictors[:k]
+        # train/validation_score_ tienen una entrada extra (la predicción inicial)
+        model.train_score_ = model.train_score_[:k + 1]
+        model.validation_score_ = model.validation_score_[:k + 1]
+        model.set_params(max_iter=k)
+        if model.n_iter_ != k:
+            raise RuntimeError(f"truncate_stages: n_iter_={model.n_iter_} después de recortar a {k} etapas")
+        return
+
+    model.estimators_ = model.estimators_[:k]
+    model.train_score_ = model.train_score_[:k]
+    for attr in ("oob_improvement_", "oob_scores_"):
+        if hasattr(model, attr):
+            setattr(model, attr, getattr(model, attr)[:k])
+    model.n_estimators_ = k
+    model.set_params(n_estimators=k)
+
+
+def select_stages(model, q: float, X_val: pd.DataFrame, y_val: np.ndarray, tolerance: float) -> dict:
+    """
+    Pinball loss en validación para CADA cantidad de etapas (staged_predict, una sola pasada)
+    y recorte a la menor cantidad cuya pérdida queda dentro de `tolerance` (relativa) de la mejor.
+    """
+    n_full = n_stages(model)
+
+    t0 = time.perf_counter()
+    model.predict(X_val)
+    # costo de inferencia por etapa y por fila (los árboles tienen profundidad similar)
+    stage_us = (time.perf_counter() - t0) / max(X_val.shape[0], 1) / n_full * 1e6
+
+    losses = np.array([
+        mean_pinball_loss(y_val, pred, alpha=q) for pred in model.staged_predict(X_val)
+    ])
+    best = float(losses.min())
+    cutoff = int(np.argmax(losses <= best * (1 + tolerance))) + 1
+
+    truncate_stages(model, cutoff)
+    return {
+        "n_stages": cutoff,
+        "n_stages_full": n_full,
+        "best_stages": int(losses.argmin()) + 1,
+        "val_pinball_best": best,
+        "val_pinball_cutoff": float(losses[cutoff - 1]),
+        "tolerance": tolerance,
+        "stage_us_por_fila": stage_us,
+        "latency_saved_us_por_fila": (n_full - cutoff) * stage_us,
+    }
+
+
+def model_input(X, columns: list[str]):
+    """
+    ndarray -> DataFrame "view" (sin copiar el memmap) para que sklearn guarde los nombres
+    de features; CSC se pasa tal cual (GradientBoosting acepta sparse).
+    """
+    if sp.issparse(X):
+        return X
+    return pd.DataFrame(X, columns=columns, copy=False)
+
+
+def fit_quantile(
+    q: float,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    columns: list[str],
+    backend: str = BACKEND,
+    early_stopping: bool = False,
+    val: tuple[np.ndarray, np.ndarray] | None = None,
+    stage_tolerance: float | None = None,
+):
+    """
+    Entrena UN modelo cuantílico. Corre dentro de un worker de joblib:
+    X_train/y_train (y la validación) llegan memory-mapped (sin copias por proceso).
+    Con `stage_tolerance` recorta el ensemble usando la validación (ver select_stages).
+    """
+    with measure(f"fit {qlabel(q)}") as stats:
+        model = make_quantile_model(q, backend, early_stopping)
+        model.fit(model_input(X_train, columns), y_train)
+        if sp.issparse(X_train):
+            # fit sobre sparse no registra nombres; predict/API le pasan DataFrames
+            model.feature_names_in_ = np.asarray(columns, dtype=object)
+
+    if stage_tolerance is not None:
+        X_val, y_val = val
+        stats["cutoff"] = select_stages(model, q, model_input(X_val, columns), y_val, stage_tolerance)
+    stats["n_stages"] = n_stages(model)
+    return q, model, stats
+
+
+def fit_quantiles(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    quantiles: list[float],
+    n_jobs: int = N_JOBS,
+    backend: str = BACKEND,
+    early_stopping: bool = False,
+    val: tuple[pd.DataFrame, pd.Series] | None = None,
+    stage_tolerance: float | None = None,
+):
+    """
+    Reparte los cuantiles entre procesos.
+
+    - X se pasa como ndarray/CSC float32 (el dtype interno de los árboles): sklearn no
+      lo vuelve a copiar y joblib lo comparte via memmap (un DataFrame se pickle-aría entero).
+    - hist: sklearn usa OpenMP adentro; joblib limita los threads por worker
+      para no sobre-suscribir los cores.
+    - Devuelve ({q: modelo}, [stats por fit]) en el mismo orden que `quantiles`.
+    """
+    X_shared = to_matrix(X_train)
+    y_shared = np.ascontiguousarray(y_train, dtype=np.float64)
+    columns = X_train.columns.tolist()
+    val_shared = None
+    if val is not None:
+        val_shared = (to_matrix(val[0]), np.ascontiguousarray(val[1], dtype=np.float64))
+
+    n_workers = max(1, min(effective_n_jobs(n_jobs), len(quantiles)))
+    results = Parallel(n_jobs=n_workers, max_nbytes="1M", mmap_mode="r")(
+        delayed(fit_quantile)(
+            q, X_shared, y_shared, columns, backend, early_stopping, val_shared, stage_tolerance
+        )
+        for q in quantiles
+    )
+
+    models = {}
+    fit_stats = []
+    for q, model, stats in results:
+        models[q] = model
+        fit_stats.append(stats)
+    return models, fit_stats
+
+
+def parse_quantiles(s: str) -> list[float]:
+    qs = sorted({float(x) for x in s.split(",") if x.strip()})
+    if not qs or any(not 0 < q < 1 for q in qs):
+        raise argparse.ArgumentTypeError("los cuantiles tienen que estar en (0, 1), ej: 0.1,0.5,0.9")
+    missing = [qlabel(q) for q in REQUIRED_QUANTILES if q not in qs]
+    if missing:
+        raise argparse.ArgumentTypeError(
+            f"faltan {', '.join(missing)}: P10/P50/P90 son obligatorios (la API devuelve p10/p50/p90; "
+            "P50 se usa en las métricas). Se pueden sumar otros, ej: 0.05,0.1,0.5,0.9,0.95"
+        )
+    return qs
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Entrena los modelos cuantílicos de precio")
+    ap.add_argument(
+        "--quantiles", type=parse_quantiles, default=QUANTILES,
+        help="lista separada por comas (default: 0.1,0.5,0.9). Ej: 0.05,0.1,0.25,0.5,0.75,0.9,0.95",
+    )
+    ap.add_argument("--jobs", type=int, default=N_JOBS, help="procesos para entrenar (-1 = todos)")
+    ap.add_argument("--backend", choices=BACKENDS, default=BACKEND, help="gbr (exacto) o hist (histogramas + categóricas nativas)")
+    ap.add_argument("--early-stopping", action="store_true", help="cortar etapas cuando la validación deja de mejorar")
+    ap.add_argument(
+        "--stage-tolerance", type=float, default=None,
+        help="recorta cada ensemble a la menor cantidad de etapas con pinball en validación "
+             "<= mejor * (1 + tolerancia). Ej: 0.005",
+    )
+    ap.add_argument(
+        "--compare-backends", action="store_true",
+        help="entrena ambos backends y muestra tiempo de entrenamiento, latencia y MAE lado a lado (guarda --backend)",
+    )
+    ap.add_argument(
+        "--incremental", type=Path, metavar="NUEVOS_CSV",
+        help="en vez de re-entrenar, suma etapas (warm start) al bundle actual con estos avisos nuevos (que todavía no están en --csv)",
+    )
+    ap.add_argument(
+        "--tune", action="store_true",
+        help="successive halving sobre los hiperparámetros de --backend (no entrena el bundle final)",
+    )
+    ap.add_argument("--extra-stages", type=int, default=EXTRA_STAGES, help="etapas nuevas por cuantil (--incremental)")
+    ap.add_argument("--recent-frac", type=float, default=RECENT_FRAC, help="fracción final del CSV base a re-usar (--incremental)")
+    ap.add_argument("--max-degradation", type=float, default=MAX_DEGRADATION, help="empeoramiento tolerado en holdout (--incremental)")
+    ap.add_argument("--csv", type=Path, default=CSV_PATH, help="dataset limpio de entrada")
+    ap.add_argument("--no-cache", action="store_true", help="ignorar el cache de tablas preparadas (pipelines/.cache)")
+    ap.add_argument("--out", type=Path, default=OUT_PATH, help="bundle .joblib de salida")
+    return ap.parse_args(argv)
+
+
+def predict_latency_us(model, X: pd.DataFrame, n_single: int = 200) -> tuple[float, float]:
+    """(µs por predicción de 1 fila, µs por fila en batch)."""
+    row = X.iloc[[0]]
+    t0 = time.perf_counter()
+    for _ in range(n_single):
+        model.predict(row)
+    single = (time.perf_counter() - t0) / n_single * 1e6
+
+    t0 = time.perf_counter()
+    model.predict(X)
+    batch = (time.perf_counter() - t0) / max(len(X), 1) * 1e6
+    return single, batch
+
+
+def train(args, backend: str):
+    """
+    Prepara (o levanta del cache), entrena y evalúa un backend.
+    Devuelve (bundle, resumen); resumen["stages"] = tiempo/memoria por etapa.
+    """
+    quantiles = args.quantiles
+    stages = []
+
+    X, y, preproc = prepare_cached(args.csv, backend=backend, use_cache=not args.no_cache, sink=stages)
 
     # mini sanity check
     print("\n===== CHECK PRECIOS (USD) =====")
@@ -182,29 +703,38 @@ def main():
         X, y, test_size=0.20, random_state=42
     )
 
-    quantiles = [0.10, 0.50, 0.90]
-    models = {}
+    labels = ", ".join(qlabel(q) for q in quantiles)
+    print(f"\nEntrenando modelos cuantílicos ({labels}) | backend={backend} | jobs={args.jobs}...\n")
 
-    print("\nEntrenando modelos cuantílicos (P10, P50, P90)...\n")
-
-    for q in quantiles:
-        model = GradientBoostingRegressor(
-            loss="quantile",
-            alpha=q,
-            random_state=42,
-            n_estimators=1200,
-            learning_rate=0.03,
-            max_depth=4,
-            subsample=0.9
+    val = None
+    if args.stage_tolerance is not None:
+        # validación fija para elegir cuántas etapas conservar (el test queda intacto)
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_train, y_train, test_size=VAL_FRACTION, random_state=42
         )
-        model.fit(X_train, y_train)
-        models[q] = model
+        val = (X_val, y_val)
 
-        pred = model.predict(X_test)
-        mae = mean_absolute_error(y_test, pred)
-        print(f"Quantile P{int(q*100):02d} | MAE (ref): USD {mae:.2f}")
+    t0 = time.perf_counter()
+    models, fit_stats = fit_quantiles(
+        X_train, y_train, quantiles,
+        n_jobs=args.jobs, backend=backend, early_stopping=args.early_stopping,
+        val=val, stage_tolerance=args.stage_tolerance,
+    )
+    train_s = time.perf_counter() - t0
+    stages.extend(fit_stats)
+
+    preds = {}
+    for q, stats in zip(quantiles, fit_stats):
+        with measure(f"eval {qlabel(q)}", stages):
+            preds[q] = models[q].predict(X_test)
+            mae = mean_absolute_error(y_test, preds[q])
+        print(
+            f"Quantile {qlabel(q)} | MAE (ref): USD {mae:.2f} "
+            f"| fit {stats['wall_s']:.1f}s | etapas {stats['n_stages']} "
+            f"| pico mem {stats['peak_mb']:.0f} MB"
+        )
 
-    pred50 = models[0.50].predict(X_test)
+    pred50 = preds[0.50]
     mae50 = mean_absolute_error(y_test, pred50)
     rmse50 = float(np.sqrt(mean_squared_error(y_test, pred50)))
     r250 = r2_score(y_test, pred50)
@@ -216,14 +746,391 @@ def main():
     print(f"RMSE: USD {rmse50:.2f}")
     print(f"R2  : {r250:.4f}")
 
+    if args.stage_tolerance is not None:
+        print("\n===== RECORTE DE ETAPAS (validación) =====")
+        for q, stats in zip(quantiles, fit_stats):
+            c = stats["cutoff"]
+            print(
+                f"{qlabel(q)}: {c['n_stages_full']} -> {c['n_stages']} etapas "
+                f"| pinball {c['val_pinball_best']:.2f} -> {c['val_pinball_cutoff']:.2f} "
+                f"| ahorro ~{c['latency_saved_us_por_fila']:.2f} µs/fila"
+            )
+        preproc["stage_cutoffs"] = {qlabel(q): stats["cutoff"] for q, stats in zip(quantiles, fit_stats)}
+
+    preproc["quantiles"] = list(quantiles)
+    preproc["version"] = new_version()
+    preproc["parent_version"] = None
+
     bundle = {
         "models": models,
         "preproc": preproc
     }
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(bundle, OUT_PATH)
-    print("\n✅ Guardado en:", OUT_PATH.resolve())
+    single_us, batch_us = predict_latency_us(models[0.50], X_test)
+    summary = {
+        "backend": backend,
+        "train_s": train_s,
+        "single_us": single_us,
+        "batch_us": batch_us,
+        "mae50": mae50,
+        "test_index": X_test.index,
+        "stages": stages,
+        "metrics": {
+            "rows": int(len(X)),
+            "features": len(preproc["features"]),
+            "mae_p50": float(mae50),
+            "rmse_p50": rmse50,
+            "r2_p50": float(r250),
+        },
+    }
+    return bundle, summary
+
+
+def tune_quantile(q: float, X: np.ndarray, y: np.ndarray, val_fold: np.ndarray, columns: list[str], args):
+    """Successive halving (HalvingRandomSearchCV) para un cuantil con pinball loss en la validación fija."""
+    est = make_quantile_model(q, args.backend)
+    if args.backend == "hist":
+        # ndarray sin nombres de columnas: categóricas por posición
+        est.set_params(categorical_features=[columns.index(c) for c in CAT_COLS])
+
+    search = HalvingRandomSearchCV(
+        est,
+        TUNE_GRID[args.backend],
+        n_candidates=TUNE_CANDIDATES,
+        factor=TUNE_FACTOR,
+        resource="n_samples",
+        min_resources="exhaust",  # la última ronda usa todas las filas
+        cv=PredefinedSplit(val_fold),
+        scoring=make_scorer(mean_pinball_loss, alpha=q, greater_is_better=False),
+        refit=False,
+        n_jobs=args.jobs,
+        random_state=42,
+    )
+    search.fit(X, y)
+
+    res = pd.DataFrame(search.cv_results_)
+    n_val = int((val_fold == 0).sum())
+    # con resource="n_samples" la validación también se submuestrea en cada ronda
+    n_val_iter = n_val * res["n_resources"] / len(y)
+
+    out = pd.DataFrame({
+        "quantile": qlabel(q),
+        "iter": res["iter"],
+        "n_resources": res["n_resources"],
+        "pinball_val": -res["mean_test_score"],
+        # mean_score_time = predict + métrica sobre la validación de esa ronda
+        "latency_us_por_pred": res["mean_score_time"] / n_val_iter * 1e6,
+    })
+    params = pd.DataFrame(list(res["params"]))
+    return pd.concat([out, params], axis=1)
+
+
+def tune(args) -> None:
+    """
+    Busca hiperparámetros por cuantil y escribe:
+    - <bundle>.tuning.csv: todos los candidatos (pinball + latencia por predicción)
+    - <bundle>.tuning.json: mejor configuración por cuantil (última ronda)
+    """
+    X, y, _ = prepare_cached(args.csv, backend=args.backend, use_cache=not args.no_cache)
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.20, random_state=42)
+
+    # fold fijo: -1 = siempre train, 0 = validación
+    rng = np.random.RandomState(42)
+    val_fold = np.where(rng.rand(len(X_train)) < VAL_FRACTION, 0, -1)
+
+    X_arr = to_matrix(X_train)
+    y_arr = y_train.to_numpy(dtype=np.float64)
+    columns = X_train.columns.tolist()
+
+    results = []
+    best = {}
+    for q in args.quantiles:
+        print(f"\n🔎 Tuning {qlabel(q)} | backend={args.backend} | {TUNE_CANDIDATES} candidatos | jobs={args.jobs}")
+        with measure(f"tune {qlabel(q)}") as stats:
+            res = tune_quantile(q, X_arr, y_arr, val_fold, columns, args)
+        results.append(res)
+
+        last = res[res["iter"] == res["iter"].max()].sort_values("pinball_val")
+        top = last.iloc[0]
+        param_names = list(TUNE_GRID[args.backend])
+        best[qlabel(q)] = {
+            "params": {k: top[k].item() for k in param_names},
+            "pinball_val": float(top["pinball_val"]),
+            "latency_us_por_pred": float(top["latency_us_por_pred"]),
+        }
+        print(last[["pinball_val", "latency_us_por_pred", *param_names]].head(5).to_string(index=False))
+        print(f"⏱️ {stats['wall_s']:.1f}s")
+
+    base = args.out.with_name(args.out.stem)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    pd.concat(results, ignore_index=True).sort_values(
+        ["quantile", "iter", "pinball_val"], ascending=[True, False, True]
+    ).to_csv(f"{base}.tuning.csv", index=False)
+    Path(f"{base}.tuning.json").write_text(
+        json.dumps({"backend": args.backend, "best": best}, indent=2), encoding="utf-8"
+    )
+    print(f"\n✅ Tuning guardado en: {base}.tuning.csv / .tuning.json")
+
+
+def new_version() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def versioned_path(out_path: Path, version: str) -> Path:
+    return out_path.with_name(f"{out_path.stem}.{version}{out_path.suffix}")
+
+
+def holdout_path(out_path: Path) -> Path:
+    """
+    Filas crudas del split de test del último entrenamiento completo:
+    holdout fijo para validar las actualizaciones incrementales.
+    """
+    return out_path.with_name(f"{out_path.stem}.holdout.csv")
+
+
+def holdout_losses(bundle: dict, holdout: pd.DataFrame) -> dict:
+    """Pinball loss por cuantil sobre el holdout fijo (features armadas con el preproc del bundle)."""
+    pre = bundle["preproc"]
+    y = pd.to_numeric(holdout["precio_usd"], errors="coerce")
+    X = build_features(bundle, holdout)
+    return {
+        qlabel(q): float(mean_pinball_loss(y, model.predict(X), alpha=q))
+        for q, model in bundle["models"].items()
+        if q in pre.get("quantiles", bundle["models"].keys())
+    }
+
+
+def incremental_training_rows(df_new: pd.DataFrame, df_recent: pd.DataFrame, holdout: pd.DataFrame,
+                              pre: dict) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    (filas para el warm start, máscara de las que son avisos nuevos): avisos nuevos + cola
+    reciente, sin filas del holdout y con los mismos filtros de precio/anio/kms que
+    prepare_ml_table (los límites guardados en el preproc).
+    """
+    df_train = pd.concat([df_new, df_recent], ignore_index=True)
+
+    # nunca entrenar sobre filas del holdout
+    key_cols = [c for c in holdout.columns if c in df_train.columns]
+    hold_keys = set(holdout[key_cols].astype(str).itertuples(index=False, name=None))
+    in_holdout = [k in hold_keys for k in df_train[key_cols].astype(str).itertuples(index=False, name=None)]
+    df_train = df_train[~np.array(in_holdout, dtype=bool)].copy()
+
+    df_train[["precio_usd", "anio", "kms"]] = df_train[["precio_usd", "anio", "kms"]].apply(pd.to_numeric, errors="coerce")
+    df_train = df_train[
+        df_train["precio_usd"].between(pre["min_price_usd"], pre["max_price_usd"])
+        & df_train["anio"].between(pre["min_year"], pre["max_year"])
+        & df_train["kms"].between(0, pre["max_kms"])
+    ]
+    # ignore_index: las primeras len(df_new) posiciones del concat son los avisos nuevos
+    return df_train, df_train.index.to_numpy() < len(df_new)
+
+
+def update_freq_maps(freq_maps: dict, df_new: pd.DataFrame) -> None:
+    """
+    Suma los conteos de los avisos nuevos a freq_maps (in place). df_new tiene que venir
+    ya filtrado (incremental_training_rows): el entrenamiento completo solo cuenta filas
+    que pasan los filtros.
+    """
+    for col, fmap in freq_maps.items():
+        if col not in df_new.columns:
+            continue
+        for value, n in norm_series(df_new[col]).value_counts().items():
+            fmap[value] = int(fmap.get(value, 0)) + int(n)
+
+
+def add_stages(model, X: pd.DataFrame, y: np.ndarray, extra_stages: int) -> None:
+    """warm_start: conserva los árboles existentes y ajusta `extra_stages` más sobre X/y."""
+    if isinstance(model, HistGradientBoostingRegressor):
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + extra_stages)
+    else:
+        # si hubo early stopping, n_estimators_ < n_estimators: seguimos desde lo que quedó
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + extra_stages)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+
+
+def hist_category_changes(model, X: pd.DataFrame) -> list[str]:
+    """
+    Columnas categóricas cuyas categorías (códigos de cat_vocab) en X no son las mismas
+    con las que se ajustó el HistGradientBoosting. En cada fit (también con warm_start)
+    el modelo re-arma su encoder y sus bins con los datos nuevos: si el conjunto de
+    categorías cambia, los árboles viejos quedan ruteando categorías que ya no son las
+    mismas. Si no se puede leer el encoder del modelo, se asume que cambió todo.
+    """
+    cat_cols = [c for c in X.columns if c in CAT_COLS]
+    try:
+        encoder = model._preprocessor.named_transformers_["encoder"]
+        fitted = [set(c[~np.isnan(c)].tolist()) for c in encoder.categories_]
+    except (AttributeError, KeyError, TypeError):
+        return cat_cols
+    changed = []
+    for col, seen in zip(cat_cols, fitted):
+        codes = X[col].to_numpy(dtype=float)
+        if set(np.unique(codes[~np.isnan(codes)]).tolist()) != seen:
+            changed.append(col)
+    return changed
+
+
+def incremental_update(args) -> None:
+    """
+    Actualiza el bundle actual sin re-entrenar desde cero:
+    1) freq_maps += conteos de los avisos nuevos
+    2) +EXTRA_STAGES etapas (warm_start) sobre avisos nuevos + cola reciente del CSV base
+    3) guarda un bundle versionado y lo valida contra el holdout fijo;
+       solo reemplaza al bundle vigente si no empeora más de MAX_DEGRADATION
+    """
+    if not args.out.exists():
+        raise SystemExit(f"❌ No existe el bundle a actualizar: {args.out} (corré primero un entrenamiento completo)")
+    hold_path = holdout_path(args.out)
+    if not hold_path.exists():
+        raise SystemExit(f"❌ No existe el holdout fijo: {hold_path} (lo genera el entrenamiento completo)")
+
+    stages = []
+    old_bundle = joblib.load(args.out)
+    bundle = copy.deepcopy(old_bundle)
+    pre = bundle["preproc"]
+    holdout = pd.read_csv(hold_path)
+
+    with measure("csv read", stages):
+        df_new = pd.read_csv(args.incremental)
+        df_base = pd.read_csv(args.csv)
+    df_recent = df_base.tail(int(len(df_base) * args.recent_frac))
+
+    df_train, is_new = incremental_training_rows(df_new, df_recent, holdout, pre)
+
+    # freq_maps: solo avisos nuevos que quedaron (los recientes ya están contados)
+    if pre.get("backend", "gbr") == "gbr":
+        update_freq_maps(pre["freq_maps"], df_train[is_new])
+
+    # features con el preproc (ya actualizado)
+    with measure("build_features", stages):
+        X = build_features(bundle, df_train)
+        y = df_train["precio_usd"].to_numpy(dtype=np.float64)
+
+    if pre.get("backend", "gbr") == "hist":
+        changed = sorted({c for m in bundle["models"].values() for c in hist_category_changes(m, X)})
+        if changed:
+            raise SystemExit(
+                f"❌ Backend hist: las categorías de {', '.join(changed)} en los datos nuevos no son las "
+                "del entrenamiento (el warm start re-arma los bins y los árboles existentes quedarían "
+                "mal ruteados). Hace falta un entrenamiento completo."
+            )
+
+    print(f"\nActualización incremental: {len(df_new)} avisos nuevos + {len(df_recent)} recientes "
+          f"-> {len(X)} filas | +{args.extra_stages} etapas por cuantil\n")
+
+    for q, model in bundle["models"].items():
+        with measure(f"warm start {qlabel(q)}", stages) as stats:
+            add_stages(model, X, y, args.extra_stages)
+        print(f"Quantile {qlabel(q)} | fit {stats['wall_s']:.1f}s | pico mem {stats['peak_mb']:.0f} MB")
+
+    with measure("eval holdout", stages):
+        old_loss = holdout_losses(old_bundle, holdout)
+        new_loss = holdout_losses(bundle, holdout)
+
+    pre["parent_version"] = pre.get("version")
+    pre["version"] = new_version()
+    pre["holdout_pinball"] = new_loss
+
+    print("\n===== HOLDOUT FIJO (pinball loss) =====")
+    degraded = []
+    for label, new in new_loss.items():
+        old = old_loss.get(label)
+        delta = (new - old) / old if old else 0.0
+        print(f"{label}: {old:.2f} -> {new:.2f} ({delta:+.2%})")
+        if delta > args.max_degradation:
+            degraded.append(label)
+
+    version_path = versioned_path(args.out, pre["version"])
+    bundle_info = save_bundle(bundle, version_path, stages)
+    write_report(version_path, pre, stages, bundle_info, holdout_pinball={"antes": old_loss, "despues": new_loss})
+    print(f"\n💾 Versión guardada en: {version_path.resolve()}")
+
+    if degraded:
+        print(f"⚠️ Empeora más de {args.max_degradation:.0%} en {', '.join(degraded)}: "
+              f"NO se reemplaza {args.out.name} (queda la versión {pre['parent_version']})")
+        return
+
+    joblib.dump(bundle, args.out)
+    print(f"✅ Bundle vigente actualizado: {args.out.resolve()}")
+
+
+def report_path(out_path: Path) -> Path:
+    return out_path.with_name(f"{out_path.stem}.report.json")
+
+
+def save_bundle(bundle: dict, out_path: Path, sink: list | None = None) -> dict:
+    """joblib.dump + tamaño serializado + cuánto tarda en cargarse (lo que paga la API al arrancar)."""
+    with measure("bundle dump", sink):
+        joblib.dump(bundle, out_path)
+    with measure("bundle load", sink) as load_stats:
+        joblib.load(out_path)
+    return {
+        "path": str(out_path),
+        "bytes": out_path.stat().st_size,
+        "load_s": load_stats["wall_s"],
+    }
+
+
+def write_report(out_path: Path, preproc: dict, stages: list[dict], bundle_info: dict, **extra) -> None:
+    """
+    Reporte JSON al lado del bundle (<bundle>.report.json) para comparar corridas:
+    tiempo y pico de memoria por etapa + tamaño/tiempo de carga del bundle.
+    """
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "version": preproc.get("version"),
+        "backend": preproc.get("backend", "gbr"),
+        "stages": stages,
+        "bundle": bundle_info,
+        **extra,
+    }
+    report_path(out_path).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    print("📊 Reporte de etapas:", report_path(out_path).resolve())
+
+
+def print_comparison(summaries: list[dict]) -> None:
+    print("\n===== COMPARACION DE BACKENDS (P50) =====")
+    print(f"{'backend':<8} {'train (s)':>10} {'1 fila (µs)':>12} {'batch (µs/fila)':>16} {'MAE (USD)':>11}")
+    for s in summaries:
+        print(
+            f"{s['backend']:<8} {s['train_s']:>10.1f} {s['single_us']:>12.0f} "
+            f"{s['batch_us']:>16.2f} {s['mae50']:>11.2f}"
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.incremental:
+        incremental_update(args)
+        return
+    if args.tune:
+        tune(args)
+        return
+
+    backends = BACKENDS if args.compare_backends else (args.backend,)
+    bundles = {}
+    summaries = []
+    for backend in backends:
+        bundles[backend], summary = train(args, backend)
+        summaries.append(summary)
+        if backend == args.backend:
+            test_index = summary["test_index"]
+
+    print_comparison(summaries)
+    bundle = bundles[args.backend]
+
+    # holdout fijo para las actualizaciones incrementales (filas crudas del test)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    save_holdout(args.csv, test_index, holdout_path(args.out))
+
+    out_path = args.out
+    stages = [dict(st, backend=sm["backend"]) for sm in summaries for st in sm["stages"]]
+    bundle_info = save_bundle(bundle, out_path, stages)
+    saved = next(sm for sm in summaries if sm["backend"] == args.backend)
+    write_report(out_path, bundle["preproc"], stages, bundle_info, metrics=saved["metrics"])
+    print(f"\n✅ Guardado ({args.backend}) en:", out_path.resolve())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Normalización de texto y booleans compartida por:
+- entrenamiento (model.py)
+- scoring en lote (predict.py)
+- la API (api/app.py)
+
+Las versiones *_series normalizan cada valor DISTINTO una sola vez y mapean el
+resultado a las filas: un millón de filas con unos miles de marca/modelo/version
+distintos cuesta unos miles de llamadas a norm_text, no un millón.
+"""
+from functools import lru_cache
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+TRUE_VALUES = {"true", "verdadero", "1", "si", "sí", "yes", "y"}
+FALSE_VALUES = {"false", "falso", "0", "no", "n"}
+
+# memo de la API: valores recientes de marca/modelo/version (acotado)
+SERVING_CACHE_SIZE = 8192
+
+
+def strip_accents(s: str) -> str:
+    if s is None:
+        return ""
+    s = str(s)
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", s)
+        if not unicodedata.combining(c)
+    )
+
+
+def norm_text(s: str) -> str:
+    """
+    Normalización consistente:
+    - quita acentos
+    - lower
+    - guiones -> espacio
+    - colapsa espacios
+    """
+    if s is None:
+        return ""
+    s = str(s).replace("–", "-").replace("—", "-")
+    s = strip_accents(s)
+    s = s.lower().strip()
+    s = s.replace("-", " ")
+    s = " ".join(s.split())
+    return s
+
+
+def to_bool01(x) -> int:
+    s = norm_text(x)
+    if s in TRUE_VALUES:
+        return 1
+    if s in FALSE_VALUES:
+        return 0
+    return 0
+
+
+@lru_cache(maxsize=SERVING_CACHE_SIZE)
+def _norm_text_memo(s: str) -> str:
+    return norm_text(s)
+
+
+def norm_text_cached(s) -> str:
+    """norm_text con memo LRU acotado (camino de la API: requests con valores repetidos)."""
+    if isinstance(s, str):
+        return _norm_text_memo(s)
+    return norm_text(s)
+
+
+def _map_unique(s: pd.Series, fn) -> np.ndarray:
+    """Aplica fn a cada valor distinto de s (NaN incluido) y devuelve el array por fila."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = np.array([fn(u) for u in uniques], dtype=object)
+    return mapped[codes]
+
+
+def norm_series(s: pd.Series) -> pd.Series:
+    """
+    norm_text sobre una columna, una vez por valor distinto.
+    Categóricas: se normalizan las categorías y el resultado sigue siendo category.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.cat.remove_unused_categories()
+        if s.isna().any():
+            # mismo resultado que norm_text(NaN) en columnas object
+            s = s.cat.add_categories("nan").fillna("nan")
+        return s.map(norm_text).astype("category")
+    return pd.Series(_map_unique(s, norm_text), index=s.index, name=s.name)
+
+
+def bool01_series(s: pd.Series) -> pd.Series:
+    """to_bool01 sobre una columna (una vez por valor distinto) -> int8."""
+    return pd.Series(_map_unique(s, to_bool01).astype(np.int8), index=s.index, name=s.name)
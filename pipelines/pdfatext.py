@@ -1,6 +1,16 @@
-import pdfplumber
+import argparse
+import csv
+import hashlib
+import io
+import json
+import time
 from pathlib import Path
 
+import pdfplumber
+
+import textacsv
+from pool import ordered_imap, resolve_workers
+
 # Carpeta raíz de entrada y salida
 PDF_ROOT = Path("pdfs")
 OUT_ROOT = Path("textos")
@@ -147,115 +157,426 @@ def drop_header_until_anchor(words, padding=10):
     return [w for w in words if w.get("doctop", w.get("top", 0)) >= y_cut]
 
 
-total_pdfs = 0
-
-# pdfs/<marca>/<combustible>/<transmision>/<direccion>/<otrosFolder>/*.pdf
-pdf_files = sorted(PDF_ROOT.glob("*/*/*/*/*/*.pdf"))
-
-if not pdf_files:
-    print(f"⚠️ No se encontraron PDFs con estructura: {PDF_ROOT}/<marca>/<combustible>/<transmision>/<direccion>/<otros>/*.pdf")
-else:
-    print(f"📦 PDFs encontrados: {len(pdf_files)}")
-
-for pdf_path in pdf_files:
-    total_pdfs += 1
+# ========= EXTRACCIÓN =========
+# PDFs por worker encolados a la vez (acota memoria y mantiene el orden de salida)
+IN_FLIGHT_PER_WORKER = 2
+SLOWEST_SHOWN = 5
 
-    try:
-        otros_folder = pdf_path.parent.name
-        direccion = pdf_path.parent.parent.name
-        transmision = pdf_path.parent.parent.parent.name
-        combustible = pdf_path.parent.parent.parent.parent.name
-        marca = pdf_path.parent.parent.parent.parent.parent.name
-    except Exception:
-        print(f"⚠️ Ruta inesperada, salteo: {pdf_path}")
-        continue
 
+def pdf_meta(pdf_path: Path) -> dict:
+    """Metadata desde la ruta: pdfs/<marca>/<combustible>/<transmision>/<direccion>/<otros>/x.pdf"""
+    otros_folder = pdf_path.parent.name
     aire, cristales = parse_otro_flags(otros_folder)
+    return {
+        "marca": pdf_path.parent.parent.parent.parent.parent.name,
+        "combustible": pdf_path.parent.parent.parent.parent.name,
+        "transmision": pdf_path.parent.parent.parent.name,
+        "direccion": pdf_path.parent.parent.name,
+        "otros_folder": otros_folder,
+        "aire": aire,
+        "cristales": cristales,
+    }
+
+
+def txt_path_for(pdf_path: Path, out_root: Path = OUT_ROOT) -> Path:
+    m = pdf_meta(pdf_path)
+    return out_root / m["marca"] / m["combustible"] / m["transmision"] / m["direccion"] / m["otros_folder"] / f"{pdf_path.stem}.txt"
+
+
+def meta_text(meta: dict) -> str:
+    return (
+        "--- META ---\n"
+        f"marca={meta['marca']}\n"
+        f"combustible={meta['combustible']}\n"
+        f"transmision={meta['transmision']}\n"
+        f"direccion={meta['direccion']}\n"
+        f"otros_folder={meta['otros_folder']}\n"
+        f"aire={str(meta['aire']).lower()}\n"
+        f"cristales={str(meta['cristales']).lower()}\n"
+        "--- /META ---\n\n"
+    )
+
+
+def page_crop_y(i: int, n_pages: int, h: float) -> tuple[float, float]:
+    """(y0, y1) del recorte de la página i (1-based) de un PDF de n_pages."""
+    # ✅ recorte dinámico por página
+    if i == 1:
+        y0 = TOP_CUT_FIRST
+        y1 = h - BOTTOM_CUT_FIRST
+    elif i == n_pages:
+        y0 = TOP_CUT_LAST
+        y1 = h - BOTTOM_CUT_LAST
+    else:
+        y0 = TOP_CUT_MIDDLE
+        y1 = h - BOTTOM_CUT_MIDDLE
+
+    # seguridad
+    y0 = max(0, min(y0, h - 1))
+    y1 = max(1, min(y1, h))
+    if y1 <= y0:
+        y0, y1 = 0, h
+    return y0, y1
+
+
+def page_text(page, i: int, n_pages: int):
+    """Genera el texto de una página (PAGE, SETTINGS, RESULTS LEFT/RIGHT) tal cual va al .txt."""
+    yield f"\n--- PAGE {i} ---\n"
+
+    w, h = page.width, page.height
+    y0, y1 = page_crop_y(i, n_pages, h)
+    crop = page.crop((0, y0, w, y1))
+
+    # ✅ extracción más estable
+    words = crop.extract_words(
+        use_text_flow=True,
+        keep_blank_chars=False,
+        extra_attrs=["doctop"],
+    )
+    if not words:
+        return
+
+    # ✅ corte header variable por anclas (solo si está activado)
+    if ENABLE_ANCHOR_CUT:
+        words = drop_header_until_anchor(words, padding=ANCHOR_PADDING)
+
+    # ✅ Sidebar manual
+    result_words = [wd for wd in words if wd["x0"] >= SIDEBAR_X]
+
+    # ✅ Split manual/auto
+    x_split = float(SPLIT_X) if SPLIT_X is not None else find_two_columns_split(result_words, w)
+
+    left_words = [wd for wd in result_words if wd["x0"] < x_split]
+    right_words = [wd for wd in result_words if wd["x0"] >= x_split]
+
+    yield (
+        "\n--- SETTINGS ---\n"
+        f"SIDEBAR_X = {SIDEBAR_X}\n"
+        f"SPLIT_X   = {x_split:.1f}  ({'MANUAL' if SPLIT_X is not None else 'AUTO'})\n"
+        f"CROP_Y0   = {y0:.1f}\n"
+        f"CROP_Y1   = {y1:.1f}\n"
+        f"ANCHOR_CUT= {str(ENABLE_ANCHOR_CUT).lower()}\n"
+    )
+    yield "\n--- RESULTS LEFT ---\n" + build_lines(left_words) + "\n"
+    yield "\n--- RESULTS RIGHT ---\n" + build_lines(right_words) + "\n"
+
+
+def pdf_text(pdf, meta: dict):
+    """Texto completo del .txt (META + páginas), de a pedazos."""
+    yield meta_text(meta)
+    n_pages = len(pdf.pages)
+    for i, page in enumerate(pdf.pages, start=1):
+        yield from page_text(page, i, n_pages)
+
+
+def extract_pdf(pdf_path: Path, out_root: Path = OUT_ROOT):
+    """
+    Extrae un PDF a su .txt. Devuelve (páginas, segundos, error).
+    Se escribe a un .tmp y se renombra al final: un PDF que falla no deja un .txt a medias.
+    """
+    t0 = time.perf_counter()
+    out_txt = txt_path_for(pdf_path, out_root)
+    out_txt.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_txt.with_name(out_txt.name + ".tmp")
+    try:
+        with pdfplumber.open(pdf_path) as pdf, open(tmp, "w", encoding="utf-8") as f:
+            n_pages = len(pdf.pages)
+            f.writelines(pdf_text(pdf, pdf_meta(pdf_path)))
+        tmp.replace(out_txt)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        return 0, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+    return n_pages, time.perf_counter() - t0, None
 
-    out_dir = OUT_ROOT / marca / combustible / transmision / direccion / otros_folder
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    out_txt = out_dir / f"{pdf_path.stem}.txt"
-    print(f"Procesando: {pdf_path}")
 
+def _per_pdf(task, pdf_files, args: tuple, workers: int):
+    """
+    Genera (pdf, *task(pdf, *args)) por PDF, en el orden de pdf_files.
+    workers > 1: un PDF por tarea en un pool de procesos, como mucho
+    IN_FLIGHT_PER_WORKER por worker esperando.
+    """
+    if workers <= 1:
+        for pdf_path in pdf_files:
+            yield (pdf_path, *task(pdf_path, *args))
+        return
+
+    tasks = ((pdf_path, (pdf_path, *args)) for pdf_path in pdf_files)
+    for pdf_path, res in ordered_imap(task, tasks, workers, IN_FLIGHT_PER_WORKER):
+        yield (pdf_path, *res)
+
+
+def extracted_pdfs(pdf_files, out_root: Path = OUT_ROOT, workers: int = 1):
+    """Genera (pdf, páginas, segundos, error) por PDF, en el orden de pdf_files."""
+    return _per_pdf(extract_pdf, pdf_files, (out_root,), workers)
+
+
+# ========= MODO FUSIONADO =========
+# PDF -> registros sin pasar por disco: las páginas salen de pdf_text y entran directo a
+# textacsv.extract_records_from_lines. fuente_archivo queda con la ruta que tendría el
+# .txt, así el CSV es el mismo que el de pdfatext.py + textacsv.py.
+def iter_chunk_lines(chunks):
+    """Líneas de un texto que llega de a pedazos (mismo corte que str.splitlines())."""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(keepends=True)
+        pending = ""
+        # la última sigue en el próximo pedazo si no terminó (o terminó en \r: puede venir \n)
+        if lines and (lines[-1].splitlines()[0] == lines[-1] or lines[-1].endswith("\r")):
+            pending = lines.pop()
+        for line in lines:
+            yield line.splitlines()[0]
+    if pending:
+        yield pending.splitlines()[0]
+
+
+def _tee(chunks, f):
+    for chunk in chunks:
+        f.write(chunk)
+        yield chunk
+
+
+def extract_pdf_records(pdf_path: Path, out_root: Path = OUT_ROOT, dump_text: bool = False):
+    """
+    (páginas, segundos, cant. registros, bloque CSV sin header, error) de un PDF.
+    dump_text: además deja el .txt de siempre (para debug), escrito a la par.
+    """
+    t0 = time.perf_counter()
+    txt_path = txt_path_for(pdf_path, out_root)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=textacsv.FIELDNAMES)
+    n = 0
+    dump = tmp = None
     try:
-        with pdfplumber.open(pdf_path) as pdf, open(out_txt, "w", encoding="utf-8") as f:
-            # Header con metadata
-            f.write("--- META ---\n")
-            f.write(f"marca={marca}\n")
-            f.write(f"combustible={combustible}\n")
-            f.write(f"transmision={transmision}\n")
-            f.write(f"direccion={direccion}\n")
-            f.write(f"otros_folder={otros_folder}\n")
-            f.write(f"aire={str(aire).lower()}\n")
-            f.write(f"cristales={str(cristales).lower()}\n")
-            f.write("--- /META ---\n\n")
-
+        with pdfplumber.open(pdf_path) as pdf:
             n_pages = len(pdf.pages)
+            chunks = pdf_text(pdf, pdf_meta(pdf_path))
+            if dump_text:
+                txt_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = txt_path.with_name(txt_path.name + ".tmp")
+                dump = open(tmp, "w", encoding="utf-8")
+                chunks = _tee(chunks, dump)
+            for rec in textacsv.extract_records_from_lines(iter_chunk_lines(chunks), txt_path):
+                writer.writerow(rec)
+                n += 1
+        if dump is not None:
+            dump.close()
+            tmp.replace(txt_path)
+    except Exception as e:
+        if dump is not None:
+            dump.close()
+            tmp.unlink(missing_ok=True)
+        return 0, time.perf_counter() - t0, 0, "", f"{type(e).__name__}: {e}"
+    return n_pages, time.perf_counter() - t0, n, buf.getvalue(), None
 
-            for i, page in enumerate(pdf.pages, start=1):
-                f.write(f"\n--- PAGE {i} ---\n")
-
-                w, h = page.width, page.height
-
-                # ✅ recorte dinámico por página
-                if i == 1:
-                    y0 = TOP_CUT_FIRST
-                    y1 = h - BOTTOM_CUT_FIRST
-                elif i == n_pages:
-                    y0 = TOP_CUT_LAST
-                    y1 = h - BOTTOM_CUT_LAST
-                else:
-                    y0 = TOP_CUT_MIDDLE
-                    y1 = h - BOTTOM_CUT_MIDDLE
-
-                # seguridad
-                y0 = max(0, min(y0, h - 1))
-                y1 = max(1, min(y1, h))
-                if y1 <= y0:
-                    y0, y1 = 0, h
-
-                crop = page.crop((0, y0, w, y1))
-
-                # ✅ extracción más estable
-                words = crop.extract_words(
-                    use_text_flow=True,
-                    keep_blank_chars=False,
-                    extra_attrs=["doctop"],
-                )
-                if not words:
-                    continue
-
-                # ✅ corte header variable por anclas (solo si está activado)
-                if ENABLE_ANCHOR_CUT:
-                    words = drop_header_until_anchor(words, padding=ANCHOR_PADDING)
-
-                # ✅ Sidebar manual
-                result_words = [wd for wd in words if wd["x0"] >= SIDEBAR_X]
-
-                # ✅ Split manual/auto
-                x_split = float(SPLIT_X) if SPLIT_X is not None else find_two_columns_split(result_words, w)
-
-                left_words = [wd for wd in result_words if wd["x0"] < x_split]
-                right_words = [wd for wd in result_words if wd["x0"] >= x_split]
-
-                f.write(f"\n--- SETTINGS ---\n")
-                f.write(f"SIDEBAR_X = {SIDEBAR_X}\n")
-                f.write(f"SPLIT_X   = {x_split:.1f}  ({'MANUAL' if SPLIT_X is not None else 'AUTO'})\n")
-                f.write(f"CROP_Y0   = {y0:.1f}\n")
-                f.write(f"CROP_Y1   = {y1:.1f}\n")
-                f.write(f"ANCHOR_CUT= {str(ENABLE_ANCHOR_CUT).lower()}\n")
-
-                f.write("\n--- RESULTS LEFT ---\n")
-                f.write(build_lines(left_words))
-                f.write("\n")
-
-                f.write("\n--- RESULTS RIGHT ---\n")
-                f.write(build_lines(right_words))
-                f.write("\n")
 
-    except Exception as e:
-        print(f"❌ Error con {pdf_path.name}: {e}")
-        continue
+def fused_pdfs(pdf_files, out_root: Path = OUT_ROOT, workers: int = 1, dump_text: bool = False):
+    """Genera (pdf, páginas, segundos, cant. registros, bloque CSV, error) por PDF, en orden."""
+    return _per_pdf(extract_pdf_records, pdf_files, (out_root, dump_text), workers)
 
-print(f"\n✅ Listo. PDFs procesados: {total_pdfs}")
+
+def write_fused_dataset(pdf_files, out_root: Path, out_csv: Path, workers: int = 1,
+                        dump_text: bool = False, report=None) -> int:
+    """
+    autos_dataset.csv directo desde los PDFs (en el orden de pdf_files): cada PDF se
+    escribe apenas está listo. report(k, total, pdf, páginas, segundos, error) -> bool
+    decide si sus filas van (default: las de los que no fallaron). Devuelve las filas escritas.
+    """
+    n_rows = 0
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", encoding="utf-8", newline="") as f:
+        csv.DictWriter(f, fieldnames=textacsv.FIELDNAMES).writeheader()
+        results = fused_pdfs(pdf_files, out_root, workers, dump_text)
+        for k, (pdf_path, n_pages, sec, n, block, err) in enumerate(results, start=1):
+            ok = report(k, len(pdf_files), pdf_path, n_pages, sec, err) if report else err is None
+            if ok:
+                f.write(block)
+                n_rows += n
+    return n_rows
+
+
+def fused_order(pdf_files, out_root: Path = OUT_ROOT) -> list:
+    """PDFs en el orden en que textacsv.py leería sus .txt (mismo orden de filas en el CSV)."""
+    return sorted(pdf_files, key=lambda pdf_path: txt_path_for(pdf_path, out_root))
+
+
+def print_summary(timings: list, errors: list, seconds: float) -> None:
+    ok = len(timings)
+    pages = sum(n for _, n, _ in timings)
+    print(f"\n✅ Listo. PDFs procesados: {ok + len(errors)} ({ok} ok, {pages} páginas, {seconds:.1f}s)")
+    if timings:
+        print("🐢 Más lentos:")
+        for pdf_path, n, sec in sorted(timings, key=lambda t: -t[2])[:SLOWEST_SHOWN]:
+            print(f"   - {sec:.2f}s  {n} págs  {pdf_path}")
+    if errors:
+        print(f"\n❌ {len(errors)} PDFs con error:")
+        for pdf_path, err in errors:
+            print(f"   - {pdf_path}: {err}")
+
+
+# ========= INCREMENTAL =========
+# Manifest en OUT_ROOT: por PDF, su sha256 (+ size/mtime para no re-hashear) y los
+# ajustes que efectivamente usó según su cantidad de páginas. Si cambia un ajuste, se
+# re-extraen solo los PDFs a los que les aplica (p.ej. BOTTOM_CUT_LAST no toca a los de
+# 1 página). Subir EXTRACT_VERSION cuando cambie el código de extracción.
+EXTRACT_VERSION = 1
+MANIFEST_NAME = "pdfatext.manifest.json"
+
+
+def effective_settings(n_pages: int) -> dict:
+    """Ajustes que influyen en el .txt de un PDF de n_pages (ver page_crop_y)."""
+    if n_pages == 0:
+        return {}
+    settings = {
+        "sidebar_x": SIDEBAR_X,
+        "split_x": SPLIT_X,
+        "anchor_cut": ENABLE_ANCHOR_CUT,
+        "anchor_padding": ANCHOR_PADDING if ENABLE_ANCHOR_CUT else None,
+        "cut_first": [TOP_CUT_FIRST, BOTTOM_CUT_FIRST],
+    }
+    if n_pages >= 2:
+        settings["cut_last"] = [TOP_CUT_LAST, BOTTOM_CUT_LAST]
+    if n_pages >= 3:
+        settings["cut_middle"] = [TOP_CUT_MIDDLE, BOTTOM_CUT_MIDDLE]
+    return settings
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    """Entradas por PDF de la corrida anterior ({} si no hay o cambió EXTRACT_VERSION)."""
+    if not manifest_path.exists():
+        return {}
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("extract_version") != EXTRACT_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def plan_incremental(pdf_files, pdf_root: Path, out_root: Path, old: dict):
+    """
+    (entradas vigentes, pendientes [(rel, pdf, entrada parcial)]).
+    Se saltea un PDF si existe su .txt, el contenido es el mismo (size+mtime iguales, o
+    mismo sha256) y los ajustes que le aplican no cambiaron.
+    """
+    files, todo = {}, []
+    for pdf_path in pdf_files:
+        rel = pdf_path.relative_to(pdf_root).as_posix()
+        st = pdf_path.stat()
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 "txt": txt_path_for(pdf_path, out_root).relative_to(out_root).as_posix()}
+        prev = old.get(rel)
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            entry["sha256"] = prev["sha256"]
+        else:
+            entry["sha256"] = file_sha256(pdf_path)
+        if (
+            prev
+            and prev["sha256"] == entry["sha256"]
+            and prev["txt"] == entry["txt"]
+            and prev["settings"] == effective_settings(prev["pages"])
+            and (out_root / entry["txt"]).exists()
+        ):
+            files[rel] = {**prev, **entry}
+        else:
+            todo.append((rel, pdf_path, entry))
+    return files, todo
+
+
+def save_manifest(manifest_path: Path, files: dict) -> None:
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps({
+        "extract_version": EXTRACT_VERSION,
+        "files": dict(sorted(files.items())),
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="pdfs/ -> textos/ (un .txt por PDF)")
+    ap.add_argument("--root", type=Path, default=PDF_ROOT)
+    ap.add_argument("--out", dest="out_root", type=Path, default=OUT_ROOT)
+    ap.add_argument("--workers", type=int, default=1, help="procesos (0 = uno por core)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="saltea PDFs sin cambios (manifest con sha256 + ajustes por PDF)")
+    ap.add_argument("--fused", action="store_true",
+                    help="PDF -> autos_dataset.csv directo, sin escribir los .txt (reemplaza a textacsv.py)")
+    ap.add_argument("--csv", dest="out_csv", type=Path, default=textacsv.OUT_CSV, help="salida de --fused")
+    ap.add_argument("--dump-text", action="store_true", help="con --fused: escribir igual los .txt (debug)")
+    args = ap.parse_args(argv)
+    if args.fused and args.incremental:
+        ap.error("--fused no se puede combinar con --incremental")
+    if args.dump_text and not args.fused:
+        ap.error("--dump-text es solo para --fused")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+
+    # pdfs/<marca>/<combustible>/<transmision>/<direccion>/<otrosFolder>/*.pdf
+    pdf_files = sorted(args.root.glob("*/*/*/*/*/*.pdf"))
+
+    if not pdf_files:
+        print(f"⚠️ No se encontraron PDFs con estructura: {args.root}/<marca>/<combustible>/<transmision>/<direccion>/<otros>/*.pdf")
+        return
+    workers = resolve_workers(args.workers)
+    print(f"📦 PDFs encontrados: {len(pdf_files)}" + (f" ({workers} workers)" if workers > 1 else ""))
+
+    to_extract = pdf_files
+    if args.incremental:
+        manifest_path = args.out_root / MANIFEST_NAME
+        old = load_manifest(manifest_path)
+        files, todo = plan_incremental(pdf_files, args.root, args.out_root, old)
+        to_extract = [pdf_path for _, pdf_path, _ in todo]
+        print(f"♻️ Incremental: {len(to_extract)} a extraer, {len(files)} sin cambios")
+
+    timings, errors = [], []
+
+    def report(k, total, pdf_path, n_pages, sec, err) -> bool:
+        if err is not None:
+            print(f"❌ [{k}/{total}] Error con {pdf_path.name}: {err}")
+            errors.append((pdf_path, err))
+            return False
+        print(f"Procesado [{k}/{total}]: {pdf_path} ({n_pages} págs, {sec:.2f}s)")
+        timings.append((pdf_path, n_pages, sec))
+        return True
+
+    if args.fused:
+        pdf_files = fused_order(pdf_files, args.out_root)
+        n_rows = write_fused_dataset(pdf_files, args.out_root, args.out_csv, workers, args.dump_text, report)
+        print_summary(timings, errors, time.perf_counter() - t0)
+        print(f"✅ Dataset generado: {n_rows} filas -> {args.out_csv}")
+        return
+
+    for k, (pdf_path, n_pages, sec, err) in enumerate(extracted_pdfs(to_extract, args.out_root, workers), start=1):
+        report(k, len(to_extract), pdf_path, n_pages, sec, err)
+
+    if args.incremental:
+        pages = {pdf_path: n for pdf_path, n, _ in timings}
+        for rel, pdf_path, entry in todo:
+            if pdf_path in pages:
+                files[rel] = {**entry, "pages": pages[pdf_path], "settings": effective_settings(pages[pdf_path])}
+                continue
+            # falló: queda sin entrada (se reintenta) y sin .txt. El que hubiera es de otra
+            # versión del PDF o de otros ajustes, y textacsv.py lo leería como si estuviera al día
+            txt = args.out_root / entry["txt"]
+            if txt.exists():
+                txt.unlink()
+                print(f"⚠️ .txt viejo borrado (el PDF cambió y no se pudo re-extraer): {txt}")
+        # PDFs que ya no están: fuera del manifest y se borra su .txt
+        current = {pdf_path.relative_to(args.root).as_posix() for pdf_path in pdf_files}
+        for rel, prev in old.items():
+            if rel not in current:
+                (args.out_root / prev["txt"]).unlink(missing_ok=True)
+        save_manifest(manifest_path, files)
+
+    print_summary(timings, errors, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# En Linux podemos resetear el pico de RSS (VmHWM) escribiendo "5" en clear_refs:
+# mide memoria real (incluye malloc de numpy/sklearn) sin el overhead de tracemalloc.
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _read_vm_hwm_mb():
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024  # viene en kB
+    except OSError:
+        return None
+    return None
+
+
+def _reset_vm_hwm() -> bool:
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Pico de RSS del proceso desde que arrancó (None si no se puede medir)."""
+    hwm = _read_vm_hwm_mb()
+    if hwm is not None:
+        return hwm
+    if resource is None:
+        return None
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: kB, macOS: bytes
+    return r / 1024 / 1024 if sys.platform == "darwin" else r / 1024
+
+
+@contextmanager
+def measure(stage: str, sink: list | None = None):
+    """
+    Mide tiempo de pared y pico de memoria de un bloque:
+
+        with measure("fit P50", sink=stats) as st:
+            model.fit(X, y)
+
+    - Linux: pico de RSS real del bloque (reset de VmHWM).
+    - Resto: pico de tracemalloc (solo lo que pasa por el allocator de Python/numpy).
+    No anidar: el bloque interno resetea el pico del externo.
+    """
+    use_hwm = _reset_vm_hwm() and _read_vm_hwm_mb() is not None
+    started_tm = False
+    if not use_hwm:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            started_tm = True
+
+    stats = {"stage": stage}
+    t0 = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats["wall_s"] = round(time.perf_counter() - t0, 3)
+        if use_hwm:
+            stats["peak_mb"] = round(_read_vm_hwm_mb(), 1)
+            stats["mem_source"] = "rss"
+        else:
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tm:
+                tracemalloc.stop()
+            stats["peak_mb"] = round(peak / 1024 / 1024, 1)
+            stats["mem_source"] = "tracemalloc"
+        if sink is not None:
+            sink.append(stats)
+
+
+@contextmanager
+def timed(stage: str, timings: dict | None):
+    """
+    Solo tiempo de pared, acumulado en timings[stage] (None = no mide).
+    Para bloques que se repiten por chunk, donde measure() sería demasiado pesado.
+    """
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
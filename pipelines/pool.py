@@ -0,0 +1,35 @@
+"""
+Pool de procesos compartido por predict.py, textacsv.py y pdfatext.py: resultados en el
+mismo orden de entrada y memoria acotada (pocas tareas encoladas por worker).
+"""
+import multiprocessing as mp
+import os
+from collections import deque
+
+
+def resolve_workers(workers: int) -> int:
+    """workers < 1 (o None) -> uno por core."""
+    if workers is None or workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+
+def ordered_imap(func, tasks, workers: int, in_flight_per_worker: int,
+                 ctx=None, initializer=None, initargs=()):
+    """
+    tasks: iterable de (key, args). Genera (key, func(*args)) en el orden de tasks.
+    Como mucho workers * in_flight_per_worker tareas esperando: el iterable se consume
+    a medida que salen resultados, no entero de entrada.
+    ctx: contexto de multiprocessing (default: el de la plataforma).
+    """
+    ctx = ctx or mp.get_context()
+    pending = deque()
+    with ctx.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        for key, args in tasks:
+            pending.append((key, pool.apply_async(func, args)))
+            if len(pending) >= workers * in_flight_per_worker:
+                key, res = pending.popleft()
+                yield key, res.get()
+        while pending:
+            key, res = pending.popleft()
+            yield key, res.get()
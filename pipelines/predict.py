@@ -1,10 +1,29 @@
 from __future__ import annotations
 
 from pathlib import Path
+import argparse
+import glob
+import multiprocessing as mp
+import time
 import joblib
 import pandas as pd
 import numpy as np
-import unicodedata
+
+# misma normalización que entrenamiento (una vez por valor distinto)
+from normalizacion import norm_series, bool01_series
+from perf import timed
+from pool import ordered_imap, resolve_workers
+
+# scoring en streaming: filas por chunk (la memoria queda acotada por esto, no por el archivo)
+CHUNK_SIZE = 50_000
+NDJSON_SUFFIXES = {".ndjson", ".jsonl", ".json"}
+FORMATS = ("csv", "ndjson")
+# columnas que usa build_features (si el primer archivo las trae, los demás también)
+INPUT_COLS = ("marca", "modelo", "version", "anio", "kms", "combustible", "transmision",
+              "direccion", "aire", "vidrio", "cristales")
+STAGES = ("read", "normalize", "encode", "predict", "write")
+# scoring multiproceso: chunks en vuelo por worker (acota la memoria del proceso principal)
+IN_FLIGHT_PER_WORKER = 2
 
 
 # =========================
@@ -18,63 +37,54 @@ def load_bundle(model_path: str | Path):
     return bundle
 
 
-# =========================
-# Text + bool normalization (igual que entrenamiento)
-# =========================
-def strip_accents(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s)
-    return "".join(
-        c for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-
-
-def norm_text(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).replace("–", "-").replace("—", "-")
-    s = strip_accents(s)
-    s = s.lower().strip()
-    s = s.replace("-", " ")
-    s = " ".join(s.split())
-    return s
-
-
-def to_bool01(x) -> int:
-    s = norm_text(x)
-    if s in {"true", "verdadero", "1", "si", "sí", "yes", "y"}:
-        return 1
-    if s in {"false", "falso", "0", "no", "n"}:
-        return 0
-    return 0
-
-
 def _safe_numeric(df: pd.DataFrame, cols: list[str]) -> None:
     for c in cols:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
 
 
+def encode_categories(df: pd.DataFrame, cat_vocab: dict) -> pd.DataFrame:
+    """
+    Backend hist: cada categórica -> código = posición en cat_vocab[col].
+    Valores que no están en el vocabulario -> NaN (el modelo los trata como missing).
+    """
+    out = pd.DataFrame(index=df.index)
+    for col, vocab in cat_vocab.items():
+        codes = {v: float(i) for i, v in enumerate(vocab)}
+        out[col] = df[col].map(codes).astype(float)
+    return out
+
+
 # =========================
 # Core: build feature row(s)
 # =========================
-def build_features(bundle: dict, rows: dict | list[dict] | pd.DataFrame) -> pd.DataFrame:
+def build_features(bundle: dict, rows: dict | list[dict] | pd.DataFrame, copy: bool = True,
+                   timings: dict | None = None) -> pd.DataFrame:
     """
     Devuelve X listo para .predict() con exactamente las columnas esperadas (preproc['features']).
     Acepta:
       - dict (un auto)
       - list[dict] (muchos autos)
       - DataFrame
+    copy=False: con DataFrame hace una copia superficial en vez de duplicar todos los datos
+    (las columnas se reemplazan, el DataFrame original no se modifica).
+    timings: si se pasa, acumula segundos en "normalize" y "encode".
     """
     pre = bundle["preproc"]
     features = list(pre["features"])
     year_ref = int(pre["year_ref"])
 
+    with timed("normalize", timings):
+        df = _normalized_frame(pre, rows, copy)
+    with timed("encode", timings):
+        return _encode_frame(pre, features, year_ref, df)
+
+
+def _normalized_frame(pre: dict, rows, copy: bool) -> pd.DataFrame:
+
     # DataFrame input
     if isinstance(rows, pd.DataFrame):
-        df = rows.copy()
+        df = rows.copy(deep=copy)
     elif isinstance(rows, dict):
         df = pd.DataFrame([rows])
     elif isinstance(rows, list):
@@ -95,15 +105,15 @@ def build_features(bundle: dict, rows: dict | list[dict] | pd.DataFrame) -> pd.D
     # Bools
     # Aire
     if "aire" in df.columns:
-        df["aire"] = df["aire"].apply(to_bool01).astype(int)
+        df["aire"] = bool01_series(df["aire"])
     else:
         df["aire"] = 0
 
     # Vidrio (o cristales)
     if "vidrio" in df.columns:
-        df["vidrio"] = df["vidrio"].apply(to_bool01).astype(int)
+        df["vidrio"] = bool01_series(df["vidrio"])
     elif "cristales" in df.columns:
-        df["vidrio"] = df["cristales"].apply(to_bool01).astype(int)
+        df["vidrio"] = bool01_series(df["cristales"])
     else:
         df["vidrio"] = 0
 
@@ -112,13 +122,24 @@ def build_features(bundle: dict, rows: dict | list[dict] | pd.DataFrame) -> pd.D
     for c in cat_cols:
         if c not in df.columns:
             df[c] = ""
-        df[c] = df[c].map(norm_text)
+        df[c] = norm_series(df[c])
+
+    return df
+
 
+def _encode_frame(pre: dict, features: list[str], year_ref: int, df: pd.DataFrame) -> pd.DataFrame:
     # Derivadas
     # edad: si anio es NaN -> edad NaN (luego lo tratamos)
     df["edad"] = year_ref - df["anio"]
     df["kms_por_anio"] = df["kms"] / df["edad"].clip(lower=1)
 
+    # Backend hist: categóricas nativas (códigos), sin freq ni one-hot
+    if pre.get("backend", "gbr") == "hist":
+        num = [f for f in features if f not in pre["cat_vocab"]]
+        X = df[num].astype(float).replace([np.inf, -np.inf], np.nan).fillna(0)
+        X = X.join(encode_categories(df, pre["cat_vocab"]))
+        return X[features]
+
     # Frecuencias (mapas guardados del entrenamiento)
     freq_maps = pre.get("freq_maps", {})
     for col in ["marca", "modelo", "version"]:
@@ -127,16 +148,17 @@ def build_features(bundle: dict, rows: dict | list[dict] | pd.DataFrame) -> pd.D
 
     # One-hot sobre las mismas columnas que en entrenamiento
     onehot_cols = ["marca", "combustible", "transmision", "direccion"]
-    df_oh = pd.get_dummies(df, columns=[c for c in onehot_cols if c in df.columns], drop_first=True)
+    # drop_first=False igual que en entrenamiento (con drop_first=True una sola fila
+    # perdía su única categoría y todas las one-hot quedaban en 0)
+    df_oh = pd.get_dummies(df, columns=[c for c in onehot_cols if c in df.columns], drop_first=False)
 
     # Alinear columnas: crear faltantes en 0 y ordenar
     for f in features:
         if f not in df_oh.columns:
             df_oh[f] = 0
 
-    X = df_oh[features].copy()
-
-    # Limpieza final de NaNs / inf (por si anio/kms vino vacío)
+    # Limpieza final de NaNs / inf (por si anio/kms vino vacío); replace ya devuelve un objeto nuevo
+    X = df_oh[features]
     X = X.replace([np.inf, -np.inf], np.nan).fillna(0)
 
     return X
@@ -175,42 +197,300 @@ def predict_price_range(bundle: dict, row: dict) -> dict:
     return out
 
 
-def predict_batch(bundle: dict, rows: list[dict] | pd.DataFrame) -> pd.DataFrame:
+def quantile_col(q: float) -> str:
+    """Columna de salida de un cuantil (como model.qlabel): 0.1 -> p10, 0.05 -> p05."""
+    return f"p{round(q * 100):02d}"
+
+
+def predict_batch(bundle: dict, rows: list[dict] | pd.DataFrame, copy: bool = True,
+                  timings: dict | None = None) -> pd.DataFrame:
     """
-    Predicción en lote. Devuelve DataFrame con columnas p10/p50/p90.
+    Predicción en lote. Devuelve DataFrame con una columna por cuantil del bundle
+    (p10/p50/p90, más p05/p95/... si se entrenaron), de menor a mayor.
     """
-    X = build_features(bundle, rows)
+    X = build_features(bundle, rows, copy=copy, timings=timings)
     models = bundle["models"]
 
-    pred = pd.DataFrame(index=X.index)
-    if 0.10 in models:
-        pred["p10"] = models[0.10].predict(X)
-    if 0.50 in models:
-        pred["p50"] = models[0.50].predict(X)
-    if 0.90 in models:
-        pred["p90"] = models[0.90].predict(X)
+    with timed("predict", timings):
+        pred = pd.DataFrame(index=X.index)
+        for q in sorted(models):
+            pred[quantile_col(q)] = models[q].predict(X)
 
     return pred.round(2)
 
 
 # =========================
-# Mini test manual
+# Streaming (archivos grandes)
 # =========================
-if __name__ == "__main__":
-    # Ajustá este path a tu proyecto
-    bundle = load_bundle("api/model/modelo_rango_autos.joblib")
-
-    sample = {
-        "marca": "Renault",
-        "modelo": "Sandero",
-        "version": "Stepway Privilege",
-        "combustible": "nafta",
-        "transmision": "mt",
-        "direccion": "hidraulica",
-        "anio": 2017,
-        "kms": 120000,
-        "aire": "si",
-        "vidrio": "si"
+def is_ndjson(path: str | Path) -> bool:
+    return Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def align_columns(chunk: pd.DataFrame, columns: list, path, warned: set) -> pd.DataFrame:
+    """
+    Chunk con exactamente columns, en ese orden (las que faltan quedan vacías).
+    La salida tiene un solo header: sin esto, un chunk NDJSON con una clave de menos o en
+    otro orden se escribiría corrido bajo las columnas del primero.
+    Las columnas que no están en columns se descartan (avisando una vez por columna).
+    """
+    if list(chunk.columns) == columns:
+        return chunk
+    extra = [c for c in chunk.columns if c not in columns and c not in warned]
+    if extra:
+        warned.update(extra)
+        print(f"\n⚠️ {path}: columnas que no están en el header de salida, se ignoran: {extra}")
+    return chunk.reindex(columns=columns)
+
+
+def iter_chunks(path: str | Path, chunk_size: int = CHUNK_SIZE, columns: list | None = None,
+                required: list | tuple = ()):
+    """
+    Lee un CSV o NDJSON (una fila JSON por línea) de a chunk_size filas.
+    Genera (chunk, bytes leídos hasta ahora) para poder estimar progreso/ETA.
+    Todos los chunks salen con columns (default: las del primer chunk, en su orden).
+    required: columnas que el archivo tiene que traer; si falta alguna -> ValueError.
+    """
+    warned = set()
+    with open(path, "rb") as f:
+        if is_ndjson(path):
+            reader = pd.read_json(f, lines=True, chunksize=chunk_size, dtype=False)
+        else:
+            reader = pd.read_csv(f, chunksize=chunk_size, low_memory=False)
+        with reader:
+            for i, chunk in enumerate(reader):
+                if i == 0:
+                    missing = [c for c in required if c not in chunk.columns]
+                    if missing:
+                        raise ValueError(f"{path}: faltan las columnas {missing} (las trae el primer archivo)")
+                if columns is None:
+                    columns = list(chunk.columns)
+                yield align_columns(chunk, columns, path, warned), f.tell()
+
+
+def format_scored(chunk: pd.DataFrame, pred: pd.DataFrame, ndjson: bool, header: bool) -> str:
+    """Filas originales + p10/p50/p90 serializadas (CSV con header opcional, o NDJSON)."""
+    df = pd.concat([chunk, pred], axis=1)
+    if ndjson:
+        return df.to_json(orient="records", lines=True, force_ascii=False)
+    return df.to_csv(header=header, index=False)
+
+
+def score_chunk(bundle: dict, chunk: pd.DataFrame, ndjson: bool, header: bool) -> tuple[str, dict]:
+    """Chunk -> (texto de salida, segundos por etapa)."""
+    timings = {}
+    pred = predict_batch(bundle, chunk, copy=False, timings=timings)
+    with timed("write", timings):
+        text = format_scored(chunk, pred, ndjson, header)
+    return text, timings
+
+
+# modelo del worker: se carga una vez en el initializer (o se hereda por fork)
+_WORKER_BUNDLE = None
+
+
+def _init_worker(bundle_path) -> None:
+    global _WORKER_BUNDLE
+    # un thread por proceso: con N workers, OpenMP (hist) no debe abrir N x cores threads
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    if bundle_path is not None:
+        _WORKER_BUNDLE = load_bundle(bundle_path)
+
+
+def _score_chunk_worker(chunk: pd.DataFrame, ndjson: bool, header: bool) -> tuple[str, dict]:
+    return score_chunk(_WORKER_BUNDLE, chunk, ndjson, header)
+
+
+def scored_blocks(bundle: dict | str | Path, chunks, ndjson: bool, workers: int = 1):
+    """
+    chunks: iterable de (chunk, progreso). Genera (n_filas, progreso, texto, timings)
+    por chunk, en el mismo orden de entrada.
+    workers > 1: pool de procesos; cada worker carga el bundle una sola vez
+    (desde el path, o heredado por fork si se pasa el dict ya cargado) y devuelve el
+    chunk ya serializado, así el proceso principal solo lee y escribe.
+    Como mucho IN_FLIGHT_PER_WORKER chunks por worker esperando -> memoria acotada.
+    """
+    global _WORKER_BUNDLE
+    if workers <= 1:
+        if not isinstance(bundle, dict):
+            bundle = load_bundle(bundle)
+        for i, (chunk, progress) in enumerate(chunks):
+            yield (len(chunk), progress, *score_chunk(bundle, chunk, ndjson, header=(i == 0)))
+        return
+
+    if isinstance(bundle, dict):
+        if "fork" not in mp.get_all_start_methods():
+            raise ValueError("Sin fork en esta plataforma: pasá el path del bundle para usar workers")
+        ctx, bundle_path = mp.get_context("fork"), None
+        _WORKER_BUNDLE = bundle  # lo heredan los workers (copy-on-write)
+    else:
+        ctx, bundle_path = mp.get_context(), str(bundle)
+
+    tasks = (((len(chunk), progress), (chunk, ndjson, i == 0)) for i, (chunk, progress) in enumerate(chunks))
+    for (n, progress), res in ordered_imap(_score_chunk_worker, tasks, workers, IN_FLIGHT_PER_WORKER,
+                                           ctx=ctx, initializer=_init_worker, initargs=(bundle_path,)):
+        yield (n, progress, *res)
+
+
+def _timed_chunks(paths: list[Path], chunk_size: int, timings: dict):
+    """
+    Chunks de todos los archivos en orden; progreso = bytes leídos del total.
+    Un solo header: todos los archivos se alinean a las columnas del primero, y los
+    siguientes tienen que traer las columnas de entrada del modelo que trae el primero.
+    """
+    done = 0
+    columns = None
+    for path in paths:
+        required = [c for c in columns if c in INPUT_COLS] if columns is not None else ()
+        it = iter_chunks(path, chunk_size, columns, required)
+        while True:
+            with timed("read", timings):
+                item = next(it, None)
+            if item is None:
+                break
+            chunk, pos = item
+            if columns is None:
+                columns = list(chunk.columns)
+            yield chunk, done + pos
+        done += path.stat().st_size
+
+
+def _fmt_eta(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+def predict_stream(bundle: dict | str | Path, in_path: str | Path | list, out_path: str | Path,
+                   chunk_size: int = CHUNK_SIZE, workers: int = 1, fmt: str | None = None,
+                   verbose: bool = True) -> dict:
+    """
+    Scoring de archivos grandes sin cargarlos enteros: lee chunk_size filas, arma features,
+    predice y agrega las filas originales + p10/p50/p90 al archivo de salida.
+    in_path: un archivo o una lista (se concatenan en ese orden, un solo header con las
+    columnas del primero; ver _timed_chunks).
+    fmt: "csv" / "ndjson" (default: según la extensión de out_path).
+    workers > 1 reparte los chunks en un pool de procesos (la salida mantiene el orden
+    de entrada); workers < 1 = un worker por core.
+    Devuelve {"rows", "chunks", "workers", "seconds", "rows_per_s", "stages"}; stages son
+    segundos por etapa (con workers, normalize/encode/predict se suman entre procesos).
+    """
+    paths = [Path(p) for p in (in_path if isinstance(in_path, (list, tuple)) else [in_path])]
+    total_bytes = sum(p.stat().st_size for p in paths) or 1
+    ndjson = is_ndjson(out_path) if fmt is None else fmt == "ndjson"
+    workers = resolve_workers(workers)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    stages = {s: 0.0 for s in STAGES}
+    t0 = time.perf_counter()
+    n_rows = n_chunks = 0
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        chunks = _timed_chunks(paths, chunk_size, stages)
+        for n, progress, text, chunk_timings in scored_blocks(bundle, chunks, ndjson, workers):
+            with timed("write", stages):
+                f.write(text)
+            for stage, sec in chunk_timings.items():
+                stages[stage] += sec
+            n_rows += n
+            n_chunks += 1
+            if verbose:
+                elapsed = time.perf_counter() - t0
+                frac = min(progress / total_bytes, 1.0)
+                eta = elapsed * (1 - frac) / frac if frac > 0 else 0.0
+                print(f"\r  {n_rows:,} filas | {n_rows / elapsed:,.0f} filas/s | "
+                      f"{frac:.0%} | ETA {_fmt_eta(eta)}", end="", flush=True)
+
+    seconds = time.perf_counter() - t0
+    stats = {
+        "rows": n_rows,
+        "chunks": n_chunks,
+        "workers": workers,
+        "seconds": round(seconds, 2),
+        "rows_per_s": round(n_rows / seconds, 1) if seconds > 0 else None,
+        "stages": {s: round(sec, 2) for s, sec in stages.items()},
     }
+    if verbose:
+        print()
+        print(f"✅ {n_rows:,} filas -> {out_path} en {stats['seconds']}s "
+              f"({stats['rows_per_s']:,} filas/s, {workers} worker(s))")
+    return stats
+
+
+def print_stages(stats: dict) -> None:
+    total = sum(stats["stages"].values()) or 1.0
+    print("\n===== TIEMPO POR ETAPA =====")
+    for stage, sec in stats["stages"].items():
+        print(f"  {stage:<10} {sec:>9.2f}s  {sec / total:>6.1%}")
+    if stats["workers"] > 1:
+        print("  (normalize/encode/predict/write sumados entre workers)")
+
 
-    print(predict_price_range(bundle, sample))
\ No newline at end of file
+# =========================
+# CLI
+# =========================
+SAMPLE = {
+    "marca": "Renault",
+    "modelo": "Sandero",
+    "version": "Stepway Privilege",
+    "combustible": "nafta",
+    "transmision": "mt",
+    "direccion": "hidraulica",
+    "anio": 2017,
+    "kms": 120000,
+    "aire": "si",
+    "vidrio": "si"
+}
+
+
+def expand_inputs(patterns: list[str]) -> list[Path]:
+    """Paths y globs -> lista de archivos (cada glob ordenado, sin repetidos)."""
+    paths = []
+    for pat in patterns:
+        matches = sorted(glob.glob(pat)) if glob.has_magic(pat) else [pat]
+        if not matches:
+            raise SystemExit(f"❌ Ningún archivo coincide con {pat!r}")
+        for m in matches:
+            p = Path(m)
+            if not p.is_file():
+                raise SystemExit(f"❌ No existe el archivo {p}")
+            if p not in paths:
+                paths.append(p)
+    return paths
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        description="Scoring en lote: agrega p10/p50/p90 a cada fila de uno o más CSV/NDJSON"
+    )
+    ap.add_argument("bundle", help="bundle .joblib (p.ej. api/model/modelo_rango_autos.joblib)")
+    ap.add_argument("inputs", nargs="*",
+                    help="archivos o globs CSV/NDJSON; sin inputs predice un auto de ejemplo")
+    ap.add_argument("--out", help="archivo de salida (requerido si hay inputs)")
+    ap.add_argument("--format", choices=FORMATS, default=None,
+                    help="formato de salida (default: según la extensión de --out)")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--workers", type=int, default=1, help="procesos (0 = uno por core)")
+    args = ap.parse_args(argv)
+    if args.inputs and not args.out:
+        ap.error("--out es requerido cuando se pasan inputs")
+    if args.chunk_size < 1:
+        ap.error("--chunk-size debe ser >= 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.inputs:
+        print(predict_price_range(load_bundle(args.bundle), SAMPLE))
+        return
+
+    paths = expand_inputs(args.inputs)
+    print(f"📥 {len(paths)} archivo(s) -> {args.out}")
+    stats = predict_stream(args.bundle, paths, args.out, chunk_size=args.chunk_size,
+                           workers=args.workers, fmt=args.format)
+    print_stages(stats)
+
+
+if __name__ == "__main__":
+    main()
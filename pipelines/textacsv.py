@@ -1,8 +1,18 @@
 import re
 import csv
+import io
+import json
+import shutil
+import hashlib
+import time
+import argparse
+from collections import deque, namedtuple
+from functools import lru_cache
 from pathlib import Path
 import unicodedata
 
+from pool import ordered_imap, resolve_workers
+
 # ========= CONFIG =========
 TEXT_ROOT = Path("textos")
 OUT_CSV = Path("autos_dataset.csv")
@@ -47,40 +57,61 @@ BAD_VENDOR_WORDS = {
     # ojo: "rs" a veces es Audi RS (modelo real). lo saco de vendor para no romper Audi RS
 }
 
+# ========= MATCHERS (se arman una vez) =========
+# una sola regex por lista: un search en vez de un "k in low" por cada substring
+RE_NOISE_ANY = re.compile("|".join(map(re.escape, NOISE_CONTAINS)))
+RE_NOISE_SETTINGS = re.compile(r"sidebar_x|split_x|crop_y|anchor_cut")
+RE_VENDOR_ANY = re.compile("|".join(map(re.escape, sorted(BAD_VENDOR_WORDS))))
+
+# la misma línea se evalúa muchas veces (búsqueda hacia atrás desde cada precio):
+# normalización y clasificación se memorizan por texto de línea
+LINE_CACHE_SIZE = 1 << 16
+
 # ========= HELPERS =========
 def strip_accents(s: str) -> str:
+    if s.isascii():
+        # NFD no cambia ASCII y no hay marcas (Mn): nada que sacar
+        return s
     s = unicodedata.normalize("NFD", s)
     return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
 
 def norm_space(s: str) -> str:
     return " ".join(s.replace("\u00ad", "").split()).strip()
 
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def line_plain(line: str) -> str:
+    """strip_accents(norm_space(line)), una vez por texto de línea."""
+    return strip_accents(norm_space(line))
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def line_low(line: str) -> str:
+    """line_plain(line).lower(): la forma con la que se comparan los filtros."""
+    return line_plain(line).lower()
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
 def is_noise(line: str) -> bool:
-    s = norm_space(line)
-    low = strip_accents(s).lower()
+    low = line_low(line)
     if not low:
         return True
     if low in BAD_SINGLE_LINES:
         return True
     if low.startswith("---"):   # meta/settings/pages
         return True
-    if "sidebar_x" in low or "split_x" in low or "crop_y" in low or "anchor_cut" in low:
+    if RE_NOISE_SETTINGS.search(low):
         return True
     if low in {"1", "2", "3", "4"}:
         return True
     if RE_ANTICIPO.search(low):
         # "Anticipo de $..." no es basura, pero no es precio real => lo tratamos aparte
         return False
-    for k in NOISE_CONTAINS:
-        if k in low:
-            return True
-    return False
+    return RE_NOISE_ANY.search(low) is not None
 
 def is_price_line_anticipo(line: str) -> bool:
     """True si es un precio pero de 'Anticipo de ...' (hay que ignorarlo como precio real)."""
-    low = strip_accents(norm_space(line)).lower()
+    low = line_low(line)
     return low.startswith("anticipo de") and RE_PRICE_ANY.search(line) is not None
 
+@lru_cache(maxsize=LINE_CACHE_SIZE)
 def parse_price(line: str):
     """Devuelve (moneda, valor_int) si es precio REAL. Si es anticipo, devuelve (None,None)."""
     if is_price_line_anticipo(line):
@@ -106,6 +137,7 @@ def to_usd(moneda: str, precio: int):
         return int(float(precio) / float(USD_RATE))
     return None
 
+@lru_cache(maxsize=LINE_CACHE_SIZE)
 def parse_year_km(line: str):
     s = norm_space(line)
     m = RE_YEAR_KM_ANY.search(s)
@@ -121,15 +153,13 @@ def is_location_like(line: str) -> bool:
         return False
     return " - " in s
 
+@lru_cache(maxsize=LINE_CACHE_SIZE)
 def looks_like_vendor(line: str) -> bool:
-    s = strip_accents(norm_space(line)).lower()
+    s = line_low(line)
     if not s:
         return False
-    # si tiene pinta de nombre de agencia, lo marcamos
-    for w in BAD_VENDOR_WORDS:
-        if w in s.split() or w in s:
-            return True
-    return False
+    # si tiene pinta de nombre de agencia, lo marcamos (alguna palabra contenida en la línea)
+    return RE_VENDOR_ANY.search(s) is not None
 
 def parse_extras(otros_folder: str):
     s = strip_accents((otros_folder or "").lower())
@@ -138,7 +168,6 @@ def parse_extras(otros_folder: str):
     return bool(aire), bool(cristales)
 
 def dedupe_consecutive(lines):
-    out = []
     prev = None
     for s in lines:
         s2 = norm_space(s)
@@ -146,9 +175,8 @@ def dedupe_consecutive(lines):
             continue
         if prev is not None and strip_accents(s2).lower() == strip_accents(prev).lower():
             continue
-        out.append(s2)
+        yield s2
         prev = s2
-    return out
 
 def merge_page_cuts(lines):
     """
@@ -156,27 +184,28 @@ def merge_page_cuts(lines):
     - si la línea nueva empieza en minúscula y la anterior no termina en puntuación
     - o si la anterior termina con '…' o '-' o queda 'a mitad de palabra'
     """
-    merged = []
+    prev = None
     for line in lines:
         line = norm_space(line)
         if not line:
             continue
-        if not merged:
-            merged.append(line)
+        if prev is None:
+            prev = line
             continue
 
-        prev = merged[-1]
-
         prev_end_bad = prev.endswith(("…", "-", "·"))
         starts_lower = line and line[0].islower()
 
         if (not prev.endswith((".", ":", ";", "!", "?")) and starts_lower) or prev_end_bad:
-            merged[-1] = prev + " " + line
+            prev = prev + " " + line
         else:
-            merged.append(line)
+            yield prev
+            prev = line
 
-    return merged
+    if prev is not None:
+        yield prev
 
+@lru_cache(maxsize=None)
 def build_brand_regex(marca_slug: str):
     """
     marca_slug puede venir: 'alfa-romeo', 'citroen', 'd-s', etc.
@@ -190,7 +219,7 @@ def build_brand_regex(marca_slug: str):
 def model_has_brand_prefix(model: str, marca_slug: str) -> bool:
     """Regla dura: el modelo debe arrancar con la marca (no solo contenerla)."""
     re_brand = build_brand_regex(marca_slug)
-    return bool(re_brand.match(strip_accents(norm_space(model))))
+    return bool(re_brand.match(line_plain(model)))
 
 BAD_MODEL_SOLO = {
     "quattro", "front", "at", "mt", "cv", "tct", "stronic", "tiptronic",
@@ -228,82 +257,112 @@ def model_has_enough_info(model: str, marca_slug: str) -> bool:
 
     return True
 
-def find_model_brand_plus_nextline(content, price_idx, marca_slug):
+# ========= TOKENS =========
+# Cada línea de content se clasifica UNA vez. El tipo sigue el mismo orden de descarte
+# que tenía la búsqueda hacia atrás del modelo; year/kms, precio y "es ubicación" se
+# guardan aparte porque las búsquedas hacia adelante los miran en cualquier línea.
+NOISE = "NOISE"
+ANTICIPO = "ANTICIPO"
+PRICE = "PRICE"
+YEAR_KM = "YEAR_KM"
+LOCATION = "LOCATION"
+VENDOR = "VENDOR"
+BRAND_LINE = "BRAND_LINE"  # arranca con la marca del folder: candidata a modelo
+OTHER = "OTHER"            # nada de lo anterior: candidata a continuación del modelo
+
+# ventanas (en líneas de content) relativas al precio
+YEAR_KM_AHEAD = 11
+LOCATION_AHEAD = 19
+MODEL_BEHIND = 29
+
+LineToken = namedtuple("LineToken", ["kind", "moneda", "precio", "year", "kms", "is_loc"])
+
+def classify_line(line: str, re_brand) -> LineToken:
+    moneda, precio = parse_price(line)
+    year, kms = parse_year_km(line)
+    is_loc = is_location_like(line)
+
+    if not line or is_noise(line) or line_low(line) in {"ad", "vehiculo validado", "vehículo validado"}:
+        kind = NOISE
+    elif is_price_line_anticipo(line):
+        kind = ANTICIPO
+    elif moneda is not None:
+        kind = PRICE
+    elif year is not None:
+        kind = YEAR_KM
+    elif is_loc:
+        kind = LOCATION
+    elif looks_like_vendor(line):
+        kind = VENDOR
+    elif re_brand.match(line_plain(line)):
+        kind = BRAND_LINE
+    else:
+        kind = OTHER
+    return LineToken(kind, moneda, precio, year, kms, is_loc)
+
+def iter_listings(content, marca_slug: str):
     """
-    Busca hacia atrás desde el precio:
-    - Encuentra la línea que arranca con la marca
-    - Agrega 1 línea siguiente como “continuación” si sirve
-    - Si no encuentra marca => "" (descarta)
+    Genera (moneda, precio, year, kms, ubicacion, modelo) por cada precio real, en orden,
+    en una sola pasada sobre content (puede ser un generador):
+    - modelo: la BRAND_LINE más cercana hacia atrás (hasta MODEL_BEHIND líneas)
+      + la línea siguiente si es OTHER; se arma apenas aparece el precio
+    - year|km: primer YEAR_KM con kms > 0 dentro de las YEAR_KM_AHEAD líneas siguientes
+    - ubicación: primera línea tipo ubicación dentro de las LOCATION_AHEAD siguientes
+    Los precios que esperan year|km / ubicación quedan en una ventana (deque) de a lo
+    sumo LOCATION_AHEAD líneas: no se guarda el archivo en memoria.
     """
-    re_brand_start = build_brand_regex(marca_slug)
-
-    for k in range(price_idx - 1, max(-1, price_idx - 30), -1):
-        l0 = norm_space(content[k])
-        if not l0 or is_noise(l0):
-            continue
-
-        low0 = strip_accents(l0).lower()
-        if low0 in {"ad", "vehiculo validado", "vehículo validado"}:
-            continue
-        if is_price_line_anticipo(l0):
-            continue
-        if parse_price(l0)[0] is not None:
-            continue
-        if parse_year_km(l0)[0] is not None:
-            continue
-        if is_location_like(l0):
-            continue
-        if looks_like_vendor(l0):
-            continue
-
-        # ✅ debe arrancar con la marca
-        if not re_brand_start.match(strip_accents(l0)):
-            continue
-
-        # candidate next line
-        l1 = ""
-        if k + 1 < len(content):
-            cand = norm_space(content[k + 1])
-            if cand and (not is_noise(cand)):
-                low1 = strip_accents(cand).lower()
-                if low1 not in {"ad", "vehiculo validado", "vehículo validado"} \
-                   and (not is_price_line_anticipo(cand)) \
-                   and parse_price(cand)[0] is None \
-                   and parse_year_km(cand)[0] is None \
-                   and (not is_location_like(cand)) \
-                   and (not looks_like_vendor(cand)):
-                    # si la siguiente también arranca con la marca, no la sumo
-                    if not re_brand_start.match(strip_accents(cand)):
-                        l1 = cand
-
-        model = l0 if not l1 else f"{l0} {l1}"
-
-        # ✅ filtro final: marca + info real
-        if not model_has_enough_info(model, marca_slug):
-            return ""
-
-        return model
-
-    return ""
+    re_brand = build_brand_regex(marca_slug)
+    pending = deque()
+    brand_idx, brand_line, brand_next = None, "", ""
+
+    for i, line in enumerate(content):
+        tok = classify_line(line, re_brand)
+
+        # la línea nueva completa a los precios que esperan
+        for p in pending:
+            if p["year"] is None and i <= p["i"] + YEAR_KM_AHEAD \
+               and tok.year is not None and tok.kms is not None and tok.kms > 0:
+                p["year"], p["kms"] = tok.year, tok.kms
+            if not p["ubic"] and tok.is_loc:
+                p["ubic"] = line
+
+        # salen en orden los que ya están resueltos
+        while pending:
+            p = pending[0]
+            if p["year"] is not None and p["ubic"]:
+                yield (p["moneda"], p["precio"], p["year"], p["kms"], p["ubic"], p["modelo"])
+            elif not (i >= p["i"] + LOCATION_AHEAD or (p["year"] is None and i >= p["i"] + YEAR_KM_AHEAD)):
+                break
+            pending.popleft()
+
+        if brand_idx == i - 1:
+            brand_next = line if tok.kind == OTHER else ""
+
+        if tok.moneda and tok.precio and brand_idx is not None and brand_idx >= i - MODEL_BEHIND:
+            model = brand_line if not brand_next else f"{brand_line} {brand_next}"
+            # ✅ filtro final: marca + info real
+            if model_has_enough_info(model, marca_slug):
+                pending.append({"i": i, "moneda": tok.moneda, "precio": tok.precio, "modelo": model,
+                                "year": None, "kms": None, "ubic": ""})
+
+        if tok.kind == BRAND_LINE:
+            brand_idx, brand_line, brand_next = i, line, ""
+
+    # fin del archivo: los que quedaron completos
+    for p in pending:
+        if p["year"] is not None and p["ubic"]:
+            yield (p["moneda"], p["precio"], p["year"], p["kms"], p["ubic"], p["modelo"])
 
 # ========= PARSER =========
-def extract_records_from_txt(txt_path: Path):
-    records = []
-
-    # metadata desde ruta
-    otros = txt_path.parent.name
-    direccion = txt_path.parent.parent.name
-    transmision = txt_path.parent.parent.parent.name
-    combustible = txt_path.parent.parent.parent.parent.name
-    marca = txt_path.parent.parent.parent.parent.parent.name
-
-    aire, cristales = parse_extras(otros)
-
-    raw_lines = txt_path.read_text(encoding="utf-8", errors="ignore").splitlines()
-
-    # Nos quedamos SOLO con RESULTS LEFT/RIGHT (evita META/SETTINGS/PAGE)
+def iter_text_lines(txt_path: Path):
+    """Líneas del .txt de a una (mismo corte que read_text().splitlines())."""
+    with txt_path.open(encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            yield from raw.splitlines()
+
+def iter_results_lines(raw_lines):
+    """Solo RESULTS LEFT/RIGHT (evita META/SETTINGS/PAGE), sin ruido, con cortes unidos y sin repetidas."""
     in_results = False
-    content = []
     for raw in raw_lines:
         s = raw.strip()
         if s.startswith("--- RESULTS LEFT") or s.startswith("--- RESULTS RIGHT"):
@@ -318,94 +377,244 @@ def extract_records_from_txt(txt_path: Path):
                 continue
             # mantenemos anticipo como línea, pero filtramos ruido
             if not is_noise(s):
-                content.append(s)
+                yield s
 
-    # unir cortes y duplicados
-    content = merge_page_cuts(content)
-    content = dedupe_consecutive(content)
-
-    i = 0
-    while i < len(content):
-        line = content[i]
-
-        moneda, precio = parse_price(line)
-        if moneda and precio:
-            # year|km adelante
-            year = kms = None
-            for j in range(i + 1, min(i + 12, len(content))):
-                y, k = parse_year_km(content[j])
-                if y is not None and k is not None and k > 0:
-                    year, kms = y, k
-                    break
-
-            # ubicación adelante (después del year|km, ideal)
-            ubic = ""
-            if year is not None:
-                for j in range(i + 1, min(i + 20, len(content))):
-                    if is_location_like(content[j]):
-                        ubic = content[j]
-                        break
-
-            if year is None or kms is None or not ubic:
-                i += 1
-                continue
+def extract_records_from_txt(txt_path: Path):
+    """Genera los registros del .txt a medida que aparecen (el archivo se lee de a una línea)."""
+    return extract_records_from_lines(iter_text_lines(txt_path), txt_path)
 
-            # ✅ modelo: SOLO si arranca con la marca del folder
-            model = find_model_brand_plus_nextline(content, i, marca)
-            if not model:
-                i += 1
-                continue
+def extract_records_from_lines(raw_lines, txt_path: Path):
+    """
+    Igual que extract_records_from_txt pero con las líneas ya en memoria (p.ej. el modo
+    fusionado de pdfatext.py). La metadata y fuente_archivo salen de txt_path, exista o no.
+    """
+    # metadata desde ruta
+    otros = txt_path.parent.name
+    direccion = txt_path.parent.parent.name
+    transmision = txt_path.parent.parent.parent.name
+    combustible = txt_path.parent.parent.parent.parent.name
+    marca = txt_path.parent.parent.parent.parent.parent.name
 
-            # ✅ validación extra: si por alguna razón no arranca con marca, descartamos (cero otras marcas)
-            if not model_has_brand_prefix(model, marca):
-                i += 1
-                continue
+    aire, cristales = parse_extras(otros)
+    fuente = str(txt_path).replace("\\", "/")
+
+    # unir cortes y duplicados
+    content = dedupe_consecutive(merge_page_cuts(iter_results_lines(raw_lines)))
 
-            precio_usd = to_usd(moneda, precio)
-
-            records.append({
-                "marca": marca,
-                "combustible": combustible,
-                "transmision": transmision,
-                "direccion": direccion,
-                "aire": aire,
-                "cristales": cristales,
-                "modelo": model,
-                "precio_usd": round(precio_usd, 2) if precio_usd is not None else "",
-                "moneda_origen": moneda,
-                "precio_origen": int(precio),
-                "anio": int(year),
-                "kms": int(kms),
-                "ubicacion": ubic,
-                "fuente_archivo": str(txt_path).replace("\\", "/"),
-            })
-
-        i += 1
-
-    return records
+    for moneda, precio, year, kms, ubic, model in iter_listings(content, marca):
+        # ✅ validación extra: si por alguna razón no arranca con marca, descartamos (cero otras marcas)
+        if not model_has_brand_prefix(model, marca):
+            continue
+
+        precio_usd = to_usd(moneda, precio)
+
+        yield {
+            "marca": marca,
+            "combustible": combustible,
+            "transmision": transmision,
+            "direccion": direccion,
+            "aire": aire,
+            "cristales": cristales,
+            "modelo": model,
+            "precio_usd": round(precio_usd, 2) if precio_usd is not None else "",
+            "moneda_origen": moneda,
+            "precio_origen": int(precio),
+            "anio": int(year),
+            "kms": int(kms),
+            "ubicacion": ubic,
+            "fuente_archivo": fuente,
+        }
 
 # ========= MAIN =========
-def main():
-    all_rows = []
-    txt_files = sorted(TEXT_ROOT.glob("*/*/*/*/*/*.txt"))
-    print(f"📂 Archivos encontrados: {len(txt_files)}")
-
-    for txt in txt_files:
-        rows = extract_records_from_txt(txt)
-        all_rows.extend(rows)
-
-    OUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_CSV.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "marca", "combustible", "transmision", "direccion",
-            "aire", "cristales",
-            "modelo", "precio_usd", "moneda_origen", "precio_origen",
-            "anio", "kms", "ubicacion", "fuente_archivo"
-        ])
-        writer.writeheader()
-        writer.writerows(all_rows)
-
-    print(f"\n✅ Dataset generado: {len(all_rows)} filas -> {OUT_CSV}")
+FIELDNAMES = [
+    "marca", "combustible", "transmision", "direccion",
+    "aire", "cristales",
+    "modelo", "precio_usd", "moneda_origen", "precio_origen",
+    "anio", "kms", "ubicacion", "fuente_archivo"
+]
+# archivos encolados por worker: los resultados salen en orden sin cargar todo el corpus
+IN_FLIGHT_PER_WORKER = 8
+ERRORS_SHOWN = 10
+
+def parse_file(txt_path: Path):
+    """
+    (cant. registros, bloque CSV sin header, error). Los registros se serializan a medida
+    que salen del parser; lo único que se junta es el texto CSV de este archivo, para que
+    uno que rompe a la mitad no deje filas sueltas: vuelve con el error y se informa al final.
+    """
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDNAMES)
+    n = 0
+    try:
+        for rec in extract_records_from_txt(txt_path):
+            writer.writerow(rec)
+            n += 1
+    except Exception as e:
+        return 0, "", f"{type(e).__name__}: {e}"
+    return n, buf.getvalue(), None
+
+def parsed_files(txt_files, workers: int = 1):
+    """
+    Genera (txt, cant. registros, bloque CSV, error) por archivo, en el orden de txt_files.
+    workers > 1: pool de procesos; cada worker devuelve el archivo ya serializado y el
+    proceso principal solo escribe. Como mucho IN_FLIGHT_PER_WORKER archivos por worker
+    esperando -> memoria acotada.
+    """
+    if workers <= 1:
+        for txt in txt_files:
+            yield (txt, *parse_file(txt))
+        return
+
+    for txt, res in ordered_imap(parse_file, ((txt, (txt,)) for txt in txt_files), workers, IN_FLIGHT_PER_WORKER):
+        yield (txt, *res)
+
+def write_dataset(txt_files, out_csv: Path, workers: int = 1) -> dict:
+    t0 = time.perf_counter()
+    n_rows = 0
+    errors = []
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", encoding="utf-8", newline="") as f:
+        csv.DictWriter(f, fieldnames=FIELDNAMES).writeheader()
+        for txt, n, block, err in parsed_files(txt_files, workers):
+            if err is not None:
+                errors.append((txt, err))
+                continue
+            f.write(block)
+            n_rows += n
+    return {"files": len(txt_files), "rows": n_rows, "errors": errors,
+            "seconds": round(time.perf_counter() - t0, 2)}
+
+# ========= INCREMENTAL =========
+# Un shard CSV por .txt (sus filas ya serializadas) + manifest con size/mtime/sha256.
+# Re-corrida: solo se parsean los .txt nuevos o cambiados, se borran los shards de los
+# que ya no están y el CSV se rearma concatenando shards en orden -> mismo archivo que
+# una corrida completa. Subir PARSER_VERSION cuando cambie lo que sale del parser
+# (USD_RATE también invalida todo: precio_usd depende de él).
+PARSER_VERSION = 1
+
+def incremental_paths(out_csv: Path) -> tuple[Path, Path]:
+    return (out_csv.with_name(out_csv.stem + ".manifest.json"),
+            out_csv.with_name(out_csv.stem + ".shards"))
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def shard_name(rel: str) -> str:
+    return hashlib.blake2b(rel.encode("utf-8"), digest_size=10).hexdigest() + ".csv"
+
+def load_manifest(manifest_path: Path, root: Path) -> dict:
+    """Entradas por archivo de la corrida anterior ({} si no hay o cambió parser/USD_RATE/root)."""
+    if not manifest_path.exists():
+        return {}
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if (
+        manifest.get("parser_version") != PARSER_VERSION
+        or manifest.get("usd_rate") != USD_RATE
+        or manifest.get("root") != str(root.resolve())
+    ):
+        return {}
+    return manifest
+
+def _unchanged(txt: Path, prev: dict | None, shard_dir: Path):
+    """(entrada del manifest para txt, reusable?). Solo se hashea si size o mtime cambiaron."""
+    st = txt.stat()
+    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if prev and (shard_dir / prev["shard"]).exists():
+        if prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            return prev, True
+        entry["sha256"] = file_sha256(txt)
+        if entry["sha256"] == prev["sha256"]:
+            return {**prev, **entry}, True   # tocado pero igual (p.ej. pdfatext lo reescribió)
+    else:
+        entry["sha256"] = file_sha256(txt)
+    return entry, False
+
+def write_dataset_incremental(root: Path, txt_files, out_csv: Path, workers: int = 1) -> dict:
+    t0 = time.perf_counter()
+    manifest_path, shard_dir = incremental_paths(out_csv)
+    manifest = load_manifest(manifest_path, root)
+    old = manifest.get("files", {})
+    if not old and shard_dir.exists():
+        shutil.rmtree(shard_dir)  # shards de otra versión del parser / otro root
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    rels = [txt.relative_to(root).as_posix() for txt in txt_files]
+    files, todo = {}, []
+    for rel, txt in zip(rels, txt_files):
+        entry, reuse = _unchanged(txt, old.get(rel), shard_dir)
+        if reuse:
+            files[rel] = entry
+        else:
+            todo.append((rel, txt, entry))
+
+    errors = []
+    parsed = parsed_files([txt for _, txt, _ in todo], workers)
+    for (rel, txt, entry), (_, n, block, err) in zip(todo, parsed):
+        if err is not None:
+            errors.append((txt, err))  # sin entrada: se reintenta en la próxima corrida
+            continue
+        shard = shard_name(rel)
+        (shard_dir / shard).write_text(block, encoding="utf-8", newline="")
+        files[rel] = {**entry, "rows": n, "shard": shard}
+
+    removed = [rel for rel in old if rel not in files]
+    for rel in removed:
+        (shard_dir / old[rel]["shard"]).unlink(missing_ok=True)
+
+    # rearmar el CSV (salvo que no haya cambiado nada y siga siendo el mismo archivo)
+    rebuilt = bool(todo or removed) or not out_csv.exists() or out_csv.stat().st_size != manifest.get("out_size")
+    if rebuilt:
+        out_csv.parent.mkdir(parents=True, exist_ok=True)
+        header = io.StringIO()
+        csv.DictWriter(header, fieldnames=FIELDNAMES).writeheader()
+        with out_csv.open("wb") as f:
+            f.write(header.getvalue().encode("utf-8"))
+            for rel in rels:
+                if rel in files:
+                    with (shard_dir / files[rel]["shard"]).open("rb") as shard:
+                        shutil.copyfileobj(shard, f)
+
+    manifest_path.write_text(json.dumps({
+        "parser_version": PARSER_VERSION,
+        "usd_rate": USD_RATE,
+        "root": str(root.resolve()),
+        "out_size": out_csv.stat().st_size,
+        "files": {rel: files[rel] for rel in rels if rel in files},
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    return {"files": len(txt_files), "rows": sum(e["rows"] for e in files.values()), "errors": errors,
+            "parsed": len(todo), "reused": len(txt_files) - len(todo), "removed": len(removed),
+            "rebuilt": rebuilt, "seconds": round(time.perf_counter() - t0, 2)}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="textos/ (pdfatext.py) -> autos_dataset.csv")
+    ap.add_argument("--root", type=Path, default=TEXT_ROOT)
+    ap.add_argument("--out", dest="out_csv", type=Path, default=OUT_CSV)
+    ap.add_argument("--workers", type=int, default=1, help="procesos (0 = uno por core)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="solo parsea .txt nuevos o cambiados (manifest + un shard por archivo)")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    txt_files = sorted(args.root.glob("*/*/*/*/*/*.txt"))
+    workers = resolve_workers(args.workers)
+    print(f"📂 Archivos encontrados: {len(txt_files)}" + (f" ({workers} workers)" if workers > 1 else ""))
+
+    if args.incremental:
+        st = write_dataset_incremental(args.root, txt_files, args.out_csv, workers)
+        print(f"♻️ Incremental: {st['parsed']} parseados, {st['reused']} sin cambios, "
+              f"{st['removed']} borrados" + ("" if st["rebuilt"] else " (CSV sin cambios)"))
+    else:
+        st = write_dataset(txt_files, args.out_csv, workers)
+
+    if st["errors"]:
+        print(f"\n⚠️ {len(st['errors'])} archivos con error (se saltearon):")
+        for txt, err in st["errors"][:ERRORS_SHOWN]:
+            print(f"   - {txt}: {err}")
+        if len(st["errors"]) > ERRORS_SHOWN:
+            print(f"   ... y {len(st['errors']) - ERRORS_SHOWN} más")
+    print(f"\n✅ Dataset generado: {st['rows']} filas -> {args.out_csv} ({st['seconds']}s)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# los pipelines son scripts sueltos que se importan entre sí por nombre
+sys.path.insert(0, str(ROOT / "pipelines"))
+# la API importa pipelines.normalizacion como paquete, igual que desde la raíz en producción
+sys.path.append(str(ROOT))
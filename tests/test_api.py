@@ -0,0 +1,46 @@
+import importlib.util
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+APP_PATH = Path(__file__).resolve().parent.parent / "api" / "app.py"
+FEATURES = ["anio", "kms", "combustible_diesel", "combustible_nafta"]
+
+
+class DieselModel:
+    """Precio que depende solo de la one-hot: si se pierde, la respuesta cambia."""
+
+    def predict(self, X):
+        return 5_000.0 + 1_000.0 * X["combustible_diesel"].to_numpy(dtype=float)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    bundle = {
+        "models": {q: DieselModel() for q in (0.10, 0.50, 0.90)},
+        "preproc": {"features": FEATURES, "year_ref": 2026},
+    }
+    # api/app.py carga el bundle al importarse
+    monkeypatch.setattr(joblib, "load", lambda path: bundle)
+    spec = importlib.util.spec_from_file_location("api_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return TestClient(module.app)
+
+
+def test_predict_una_fila_conserva_su_one_hot(client):
+    # con get_dummies(drop_first=True) la única categoría de la fila se borraba -> diesel = 0
+    r = client.post("/predict", json={"anio": 2018, "kms": 60_000, "combustible": "Diesel"})
+    assert r.status_code == 200
+    assert r.json()["p50"] == 6_000.0
+
+
+def test_build_features_batch_una_fila_conserva_su_one_hot():
+    import predict
+
+    bundle = {"models": {}, "preproc": {"features": FEATURES, "year_ref": 2026}}
+    X = predict.build_features(bundle, {"anio": 2018, "kms": 60_000, "combustible": "diesel"})
+    assert np.asarray(X.loc[0, ["combustible_diesel", "combustible_nafta"]], dtype=float).tolist() == [1.0, 0.0]
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from casi_duplicados import (
+    collapse_near_duplicates, find_near_duplicates, minhash_signatures, numeric_close, numeric_columns,
+    token_hashes, union_find,
+)
+from limpieza import FIELDNAMES
+
+VERSION = "2.0 Cd Tdi 180cv Highline 4x4 At"
+
+
+def listings(rows):
+    df = pd.DataFrame([
+        {"marca": "volkswagen", "modelo": "Amarok", "version": VERSION, "anio": str(anio),
+         "kms": str(kms), "precio_usd": str(precio), "combustible": "diesel", "transmision": "automatica",
+         "direccion": "hidraulica", "aire": "True", "vidrio": "True"}
+        for anio, kms, precio in rows
+    ])
+    return df[FIELDNAMES]
+
+
+def signatures(df):
+    rows, hashes = token_hashes(df)
+    return minhash_signatures(rows, hashes, len(df))
+
+
+def brute_force_clusters(df, threshold=0.8):
+    """Todos contra todos: firmas >= threshold + kms / precio cerca (lo que el LSH tiene que encontrar)."""
+    sig = signatures(df)
+    i, j = np.triu_indices(len(df), k=1)
+    pairs = np.stack([i, j], axis=1)
+    pairs = pairs[(df["anio"].to_numpy()[i] == df["anio"].to_numpy()[j])]
+    pairs = pairs[(sig[pairs[:, 0]] == sig[pairs[:, 1]]).mean(axis=1) >= threshold]
+    pairs = pairs[numeric_close(*numeric_columns(df), pairs[:, 0], pairs[:, 1])]
+    return union_find(len(df), pairs)
+
+
+def test_misma_version_con_distinto_anio_kms_o_precio_no_se_une():
+    df = listings([
+        (2010, 150_000, 8_000),
+        (2019, 20_000, 25_000),
+        (2015, 90_000, 14_000),
+        (2022, 5_000, 32_000),
+        (2019, 90_000, 25_000),   # mismo anio, otros kms
+        (2019, 20_000, 14_000),   # mismo anio y kms, otro precio
+    ])
+    kept, _ = collapse_near_duplicates(df, threshold=0.8)
+    assert len(kept) == len(df)
+    # el texto solo sí los hubiera unido
+    sig = signatures(df)
+    assert (sig[1] == sig[5]).mean() >= 0.8
+
+
+def test_republicacion_con_pocos_cambios_se_une():
+    df = listings([
+        (2019, 20_000, 25_000),
+        (2019, 21_500, 24_500),
+        (2015, 90_000, 14_000),
+    ])
+    kept, _ = collapse_near_duplicates(df, threshold=0.8)
+    assert kept["anio"].tolist() == ["2019", "2015"]
+
+
+def test_bucket_grande_de_una_version_encuentra_todas_las_republicaciones():
+    # 150 autos de la misma versión y año (kms / precio lejos entre sí) + una re-publicación
+    # de cada uno con +3000 km y +4% de precio, mezclados: un solo bucket de 300 avisos
+    rng = np.random.default_rng(0)
+    base = [(2019, kms, round(5_000 * 1.25 ** p))
+            for kms in (10_000, 40_000, 90_000, 160_000, 250_000, 400_000) for p in range(25)]
+    reposts = [(anio, kms + 3_000, round(precio * 1.04)) for anio, kms, precio in base]
+    df = listings(base + reposts).iloc[rng.permutation(300)].reset_index(drop=True)
+
+    cluster, _ = find_near_duplicates(df, threshold=0.8)
+    expected = brute_force_clusters(df)
+
+    assert len(np.unique(expected)) < 200  # la mayoría de las re-publicaciones pasan la verificación
+    assert pd.factorize(cluster)[0].tolist() == pd.factorize(expected)[0].tolist()
@@ -0,0 +1,109 @@
+import csv
+
+import pytest
+
+from limpieza import (
+    clean_frame, clean_incremental, dedupe_memory, iter_clean_rows, main, parse_args, read_raw_frame, state_paths,
+    write_frame, write_rows,
+)
+
+HEADER = ["marca", "modelo", "anio", "kms", "precio_usd", "combustible", "transmision", "direccion",
+          "aire", "cristales"]
+
+
+def raw_line(modelo, anio, kms, precio):
+    return f"volkswagen,Volkswagen {modelo},{anio},{kms},{precio},Diesel,Manual,Hidráulica,Sí,No\n"
+
+
+def write_raw(path, lines):
+    path.write_bytes((",".join(HEADER) + "\n" + "".join(lines)).encode("utf-8"))
+
+
+def full_run(in_csv, out_csv):
+    write_rows(out_csv, dedupe_memory(iter_clean_rows(in_csv)))
+    with out_csv.open(encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def read_out(path):
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_prefijo_reescrito_lejos_del_final_fuerza_corrida_completa(tmp_path):
+    in_csv, out_csv = tmp_path / "raw.csv", tmp_path / "limpio.csv"
+    # muchas filas: el cambio queda lejos del final (fuera de cualquier ventana de bytes)
+    lines = [raw_line("Amarok 2.0 Tdi Highline", 2010 + i % 12, 1000 * i, 10_000 + i) for i in range(3000)]
+    write_raw(in_csv, lines)
+    assert clean_incremental(in_csv, out_csv)["mode"] == "completo"
+
+    # se corrige el precio de la segunda fila (mismo largo) y se agrega una fila
+    lines[1] = lines[1].replace(",10001,", ",99999,")
+    write_raw(in_csv, lines + [raw_line("Vento 2.5 Luxury", 2012, 5, 7000)])
+    st = clean_incremental(in_csv, out_csv)
+
+    assert st["mode"] == "completo"
+    assert read_out(out_csv) == full_run(in_csv, tmp_path / "ref.csv")
+
+
+def test_ultima_linea_sin_salto_se_avisa_y_se_toma_despues(tmp_path):
+    in_csv, out_csv = tmp_path / "raw.csv", tmp_path / "limpio.csv"
+    completa = raw_line("Amarok 2.0 Tdi Highline", 2019, 20_000, 25_000)
+    parcial = raw_line("Vento 2.5 Luxury", 2012, 5, 7000).rstrip("\n")
+    write_raw(in_csv, [completa, parcial])
+
+    st = clean_incremental(in_csv, out_csv)
+    assert st["pending_bytes"] == len(parcial.encode("utf-8"))
+    assert st["total"] == 1
+
+    write_raw(in_csv, [completa, parcial + "\n"])
+    st = clean_incremental(in_csv, out_csv)
+    assert (st["mode"], st["pending_bytes"], st["added"]) == ("incremental", 0, 1)
+    assert read_out(out_csv) == full_run(in_csv, tmp_path / "ref.csv")
+
+
+def test_motor_columnas_igual_que_filas_con_campos_de_mas_o_de_menos(tmp_path):
+    in_csv = tmp_path / "raw.csv"
+    write_raw(in_csv, [
+        raw_line("Amarok 2.0 Tdi Highline", 2019, 20_000, 25_000),
+        raw_line("Vento 2.5 Luxury", 2012, 5, 7000).replace("\n", ",campo,de,mas\n"),
+        "volkswagen,Volkswagen Gol 1.6 Trend,2014,50000,6000,Nafta\n",
+        raw_line("Amarok 2.0 Tdi Highline", 2019, 20_000, 25_000),
+    ])
+    write_frame(tmp_path / "cols.csv", clean_frame(read_raw_frame(in_csv)))
+    rows = full_run(in_csv, tmp_path / "rows.csv")
+
+    assert len(rows) == 3
+    assert (tmp_path / "cols.csv").read_bytes() == (tmp_path / "rows.csv").read_bytes()
+
+
+@pytest.mark.parametrize("umbral", ["0", "-0.5", "1.5"])
+def test_umbral_casi_duplicados_fuera_de_rango(umbral):
+    with pytest.raises(SystemExit):
+        parse_args(["--casi-duplicados", umbral])
+
+
+def test_umbral_casi_duplicados_valido():
+    assert parse_args(["--casi-duplicados"]).near_threshold == 0.8
+    assert parse_args(["--casi-duplicados", "1"]).near_threshold == 1.0
+
+
+def test_corrida_con_casi_duplicados_invalida_el_estado_incremental(tmp_path):
+    in_csv, out_csv = tmp_path / "raw.csv", tmp_path / "limpio.csv"
+    lines = [
+        raw_line("Amarok 2.0 Tdi Highline", 2019, 20_000, 25_000),
+        raw_line("Amarok 2.0 Tdi Highline", 2019, 21_000, 24_500),  # re-publicación
+        raw_line("Vento 2.5 Luxury", 2012, 90_000, 7000),
+    ]
+    write_raw(in_csv, lines)
+    clean_incremental(in_csv, out_csv)
+    assert all(p.exists() for p in state_paths(out_csv))
+
+    main(["--in", str(in_csv), "--out", str(out_csv), "--casi-duplicados"])
+    assert len(read_out(out_csv)) == 2
+    assert not any(p.exists() for p in state_paths(out_csv))
+
+    # la próxima incremental no mergea sobre el output colapsado: reconstruye todo
+    write_raw(in_csv, lines + [raw_line("Gol 1.6 Trend", 2014, 50_000, 6000)])
+    assert clean_incremental(in_csv, out_csv)["mode"] == "completo"
+    assert read_out(out_csv) == full_run(in_csv, tmp_path / "ref.csv")
@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+import model
+from model import _base_preproc, incremental_training_rows, truncate_stages, update_freq_maps
+
+
+def avisos(rows):
+    return pd.DataFrame([
+        {"marca": marca, "modelo": modelo, "version": "1.6", "anio": anio, "kms": kms, "precio_usd": precio,
+         "combustible": "nafta"}
+        for marca, modelo, anio, kms, precio in rows
+    ])
+
+
+def test_freq_maps_incremental_solo_cuenta_avisos_nuevos_que_pasan_los_filtros():
+    df_new = avisos([
+        ("fiat", "palio", 2015, 80_000, 6_000),
+        ("fiat", "palio", 2015, 80_000, 50),          # precio fuera de rango
+        ("fiat", "uno", 1950, 10_000, 5_000),         # anio fuera de rango
+        ("ford", "ka", 2018, 40_000, 9_000),          # está en el holdout
+    ])
+    df_recent = avisos([("fiat", "palio", 2014, 90_000, 5_500)])
+    holdout = avisos([("ford", "ka", 2018, 40_000, 9_000)])
+    pre = _base_preproc()
+    pre["freq_maps"] = {"marca": {"fiat": 10}, "modelo": {"palio": 4}}
+
+    df_train, is_new = incremental_training_rows(df_new, df_recent, holdout, pre)
+    update_freq_maps(pre["freq_maps"], df_train[is_new])
+
+    assert len(df_train) == 2 and is_new.tolist() == [True, False]
+    assert pre["freq_maps"] == {"marca": {"fiat": 11}, "modelo": {"palio": 5}}
+
+
+def regression_data(n=300):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"anio": rng.integers(2000, 2025, n), "kms": rng.integers(0, 300_000, n)}).astype(float)
+    y = 20_000 - 15 * (2025 - X["anio"]) * 100 - X["kms"] / 20 + rng.normal(0, 500, n)
+    return X, y.to_numpy()
+
+
+@pytest.mark.parametrize("estimator", [
+    GradientBoostingRegressor(loss="quantile", alpha=0.5, n_estimators=30, random_state=0),
+    HistGradientBoostingRegressor(loss="quantile", quantile=0.5, max_iter=30, early_stopping=False, random_state=0),
+], ids=["gbr", "hist"])
+def test_truncate_stages_predice_igual_que_staged_predict(estimator):
+    X, y = regression_data()
+    fitted = estimator.fit(X, y)
+    staged = list(fitted.staged_predict(X))
+
+    for k in (1, 12, 30):
+        m = copy.deepcopy(fitted)
+        truncate_stages(m, k)
+        assert model.n_stages(m) == k
+        np.testing.assert_allclose(m.predict(X), staged[k - 1])
+
+
+def test_truncate_stages_hist_falla_con_sklearn_no_verificado(monkeypatch):
+    X, y = regression_data(50)
+    m = HistGradientBoostingRegressor(loss="quantile", quantile=0.5, max_iter=5, early_stopping=False).fit(X, y)
+    monkeypatch.setattr(sklearn, "__version__", "2.0.0")
+    with pytest.raises(RuntimeError, match="HIST_TRUNCATE_SKLEARN"):
+        truncate_stages(m, 2)
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("pdfplumber")
+
+import pdfatext  # noqa: E402
+
+
+def fake_extract(fail: set):
+    def extract_pdf(pdf_path, out_root=pdfatext.OUT_ROOT):
+        if pdf_path.name in fail:
+            return 0, 0.0, "PDFSyntaxError: roto"
+        out_txt = pdfatext.txt_path_for(pdf_path, out_root)
+        out_txt.parent.mkdir(parents=True, exist_ok=True)
+        out_txt.write_text(pdf_path.read_text(encoding="utf-8"), encoding="utf-8")
+        return 1, 0.0, None
+    return extract_pdf
+
+
+def test_pdf_cambiado_que_falla_no_deja_el_txt_viejo(tmp_path, monkeypatch):
+    pdf_root, out_root = tmp_path / "pdfs", tmp_path / "textos"
+    folder = pdf_root / "ford" / "nafta" / "manual" / "hidraulica" / "otros"
+    folder.mkdir(parents=True)
+    (folder / "a.pdf").write_text("version 1", encoding="utf-8")
+    (folder / "b.pdf").write_text("sin cambios", encoding="utf-8")
+    argv = ["--root", str(pdf_root), "--out", str(out_root), "--incremental"]
+
+    monkeypatch.setattr(pdfatext, "extract_pdf", fake_extract(set()))
+    pdfatext.main(argv)
+    txt_a = pdfatext.txt_path_for(folder / "a.pdf", out_root)
+    assert txt_a.read_text(encoding="utf-8") == "version 1"
+
+    (folder / "a.pdf").write_text("version 2 (más larga)", encoding="utf-8")
+    monkeypatch.setattr(pdfatext, "extract_pdf", fake_extract({"a.pdf"}))
+    pdfatext.main(argv)
+
+    assert not txt_a.exists()
+    assert pdfatext.txt_path_for(folder / "b.pdf", out_root).exists()
+    assert list(pdfatext.load_manifest(out_root / pdfatext.MANIFEST_NAME)) == [
+        "ford/nafta/manual/hidraulica/otros/b.pdf"
+    ]
@@ -0,0 +1,36 @@
+import multiprocessing as mp
+import time
+
+import pytest
+
+from pool import ordered_imap, resolve_workers
+
+
+def slow_square(x):
+    # los primeros tardan más: sin el orden del deque saldrían al revés
+    time.sleep(0.02 * (5 - x) if x < 5 else 0)
+    return x * x
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="necesita fork")
+def test_ordered_imap_respeta_el_orden_y_consume_de_a_poco():
+    consumed = []
+
+    def tasks():
+        for x in range(20):
+            consumed.append(x)
+            yield x, (x,)
+
+    out = []
+    for key, res in ordered_imap(slow_square, tasks(), workers=2, in_flight_per_worker=2,
+                                 ctx=mp.get_context("fork")):
+        if not out:
+            assert len(consumed) == 4  # workers * in_flight_per_worker
+        out.append((key, res))
+    assert out == [(x, x * x) for x in range(20)]
+
+
+def test_resolve_workers():
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) >= 1
+    assert resolve_workers(None) >= 1
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict
+
+
+class ConstModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value, dtype=float)
+
+
+def tiny_bundle():
+    return {
+        "models": {0.10: ConstModel(1.0), 0.50: ConstModel(2.0), 0.90: ConstModel(3.0)},
+        "preproc": {"features": ["anio", "kms"], "year_ref": 2025},
+    }
+
+
+def write_ndjson(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def test_ndjson_con_claves_distintas_entre_chunks_queda_alineado(tmp_path):
+    rows = [{"marca": "ford", "direccion": "hidraulica", "combustible": "nafta", "anio": 2015, "kms": 1000}] * 3
+    # segundo chunk: sin direccion y con las claves en otro orden
+    rows += [{"kms": 2000, "anio": 2018, "combustible": "diesel", "marca": "fiat"}] * 3
+    in_path, out_path = tmp_path / "in.ndjson", tmp_path / "out.csv"
+    write_ndjson(in_path, rows)
+
+    predict.predict_stream(tiny_bundle(), in_path, out_path, chunk_size=3, verbose=False)
+
+    out = pd.read_csv(out_path)
+    assert list(out.columns) == ["marca", "direccion", "combustible", "anio", "kms", "p10", "p50", "p90"]
+    assert out["combustible"].tolist() == ["nafta"] * 3 + ["diesel"] * 3
+    assert out["marca"].tolist() == ["ford"] * 3 + ["fiat"] * 3
+    assert out["direccion"].isna().tolist() == [False] * 3 + [True] * 3
+    assert out["kms"].tolist() == [1000] * 3 + [2000] * 3
+
+
+def test_varios_archivos_se_alinean_al_primero(tmp_path):
+    csv_path, nd_path, out_path = tmp_path / "a.csv", tmp_path / "b.ndjson", tmp_path / "out.csv"
+    pd.DataFrame({"marca": ["ford"], "combustible": ["nafta"], "anio": [2015], "kms": [1000]}).to_csv(csv_path, index=False)
+    write_ndjson(nd_path, [{"kms": 2000, "anio": 2018, "combustible": "diesel", "marca": "fiat", "extra": 1}])
+
+    predict.predict_stream(tiny_bundle(), [csv_path, nd_path], out_path, verbose=False)
+
+    out = pd.read_csv(out_path)
+    assert list(out.columns) == ["marca", "combustible", "anio", "kms", "p10", "p50", "p90"]
+    assert out["combustible"].tolist() == ["nafta", "diesel"]
+    assert out["kms"].tolist() == [1000, 2000]
+
+
+def test_archivo_siguiente_sin_columna_de_entrada_falla(tmp_path):
+    csv_path, nd_path, out_path = tmp_path / "a.csv", tmp_path / "b.ndjson", tmp_path / "out.csv"
+    pd.DataFrame({"marca": ["ford"], "combustible": ["nafta"], "anio": [2015], "kms": [1000]}).to_csv(csv_path, index=False)
+    write_ndjson(nd_path, [{"kms": 2000, "anio": 2018, "marca": "fiat"}])
+
+    with pytest.raises(ValueError, match="combustible"):
+        predict.predict_stream(tiny_bundle(), [csv_path, nd_path], out_path, verbose=False)
+
+
+def test_salen_todos_los_cuantiles_del_bundle():
+    bundle = tiny_bundle()
+    bundle["models"].update({0.05: ConstModel(0.5), 0.95: ConstModel(4.0)})
+    pred = predict.predict_batch(bundle, [{"anio": 2015, "kms": 1000}])
+    assert list(pred.columns) == ["p05", "p10", "p50", "p90", "p95"]